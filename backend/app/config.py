@@ -8,27 +8,134 @@ class Settings:
         BASE_DIR = Path(__file__).resolve().parent
         
         # Model filenames on HF repo
-        repo_id = "nagashreens05/deepguard"
+        self.MODEL_REPO_ID = os.getenv("MODEL_REPO_ID", "nagashreens05/deepguard")
+        self.MODEL_FILES = {
+            "faceforensics": "final_faceforensics_resnet50.keras",
+            "celebdf": "final_resnet50_deepfake.keras",
+            "audio": "final_model.keras",
+        }
 
-        # Download models from HF (they will be cached in ~/.cache/huggingface)
-        self.VIDEO_MODEL_PATH = Path(
-            hf_hub_download(repo_id=repo_id, filename="final_faceforensics_resnet50.keras")
-        )
+        # Local paths skip the HF download entirely
+        self._model_paths = {
+            "faceforensics": os.getenv("VIDEO_MODEL_PATH"),
+            "celebdf": os.getenv("VIDEO_MODEL_CDF_PATH"),
+            "audio": os.getenv("AUDIO_MODEL_PATH"),
+        }
 
-        self.VIDEO_MODEL_CDF_PATH = Path(
-            hf_hub_download(repo_id=repo_id, filename="final_resnet50_deepfake.keras")
-        )
+        # Identifies the deployed weights; derived from the model files when unset
+        self.MODEL_VERSION = os.getenv("MODEL_VERSION")
 
-        self.AUDIO_MODEL_PATH = Path(
-            hf_hub_download(repo_id=repo_id, filename="final_model.keras")
-        )
+        # "keras" runs the .keras models through TensorFlow; "tflite" runs the
+        # converted models from TFLITE_MODEL_DIR (tools/export_tflite.py)
+        self.INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "keras")
+        self.TFLITE_MODEL_DIR = Path(os.getenv("TFLITE_MODEL_DIR", "tflite_models")).resolve()
+        self.TFLITE_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", str(os.cpu_count() or 1)))
+
+        # Load (and warm) models in a background thread after the port is bound
+        self.BACKGROUND_MODEL_LOADING = os.getenv("BACKGROUND_MODEL_LOADING", "1") == "1"
 
         # Processing parameters
         self.FRAME_INTERVAL = 10
+        self.FRAME_BACKEND = os.getenv("FRAME_BACKEND", "opencv")  # "opencv" or "ffmpeg"
         self.INPUT_SHAPE = (224, 224, 3)
         self.AUDIO_SAMPLE_RATE = 16000
         self.N_MFCC = 40
 
+        # Sliding-window audio scoring (stride in MFCC time steps; 100-step windows)
+        self.AUDIO_WINDOW_STRIDE = int(os.getenv("AUDIO_WINDOW_STRIDE", "50"))
+        self.AUDIO_MAX_WINDOWS = int(os.getenv("AUDIO_MAX_WINDOWS", "16"))
+        self.AUDIO_PROGRESS_CHUNK = int(os.getenv("AUDIO_PROGRESS_CHUNK", "4"))  # Windows per model call when reporting progress
+        # "librosa" computes MFCCs in NumPy before the model; "tf" prepends the
+        # in-graph front end (app/models/audio_frontend.py) so the model takes raw PCM
+        self.AUDIO_FRONTEND = os.getenv("AUDIO_FRONTEND", "librosa")
+        self.AUDIO_WINDOW_AGGREGATE = os.getenv("AUDIO_WINDOW_AGGREGATE", "mean")  # "mean" or "max"
+
+        # "video" scores frames only, "combined" also scores the video's audio track
+        self.VIDEO_ANALYSIS_MODE = os.getenv("VIDEO_ANALYSIS_MODE", "video")
+
+        # Face-region inference: detector on every FACE_DETECT_EVERY-th sampled frame, tracking in between
+        self.FACE_CROP = os.getenv("FACE_CROP", "0") == "1"
+        self.FACE_DETECTOR = os.getenv("FACE_DETECTOR", "mtcnn")  # "mtcnn" (as in training) or "haar"
+        self.FACE_DETECT_EVERY = int(os.getenv("FACE_DETECT_EVERY", "5"))
+        self.FACE_DETECT_WIDTH = int(os.getenv("FACE_DETECT_WIDTH", "480"))
+        self.FACE_TRACK_MIN_SCORE = float(os.getenv("FACE_TRACK_MIN_SCORE", "0.6"))
+
+        # Near-duplicate frames share one model call (app/utils/frame_dedup.py): candidates within
+        # FRAME_DEDUP_MAX_DISTANCE bits of dHash, confirmed only if no pixel of a 32x32 grey thumbnail
+        # differs by more than FRAME_DEDUP_MAX_PIXEL_DIFF levels. Reused scores are not recomputed, so
+        # results can differ slightly from scoring every frame; opt in per deployment
+        self.FRAME_DEDUP = os.getenv("FRAME_DEDUP", "0") == "1"
+        self.FRAME_DEDUP_MAX_DISTANCE = int(os.getenv("FRAME_DEDUP_MAX_DISTANCE", "3"))
+        self.FRAME_DEDUP_MAX_PIXEL_DIFF = int(os.getenv("FRAME_DEDUP_MAX_PIXEL_DIFF", "6"))
+
+        # Cross-request batching of video frames
+        self.VIDEO_BATCHING = os.getenv("VIDEO_BATCHING", "1") == "1"
+        self.VIDEO_BATCH_SIZE = int(os.getenv("VIDEO_BATCH_SIZE", "32"))
+        self.VIDEO_BATCH_MAX_WAIT_MS = float(os.getenv("VIDEO_BATCH_MAX_WAIT_MS", "10"))
+
+        # Batch sizes the models are traced and warmed for; any other batch is split at the
+        # largest and zero-padded up to the next, so steady-state traffic never retraces
+        self.VIDEO_BATCH_BUCKETS = self._buckets("VIDEO_BATCH_BUCKETS", self.VIDEO_BATCH_SIZE)
+        self.AUDIO_BATCH_BUCKETS = self._buckets("AUDIO_BATCH_BUCKETS", self.AUDIO_MAX_WINDOWS)
+
+        # Sequential early exit for video scoring (overridable per request)
+        self.EARLY_EXIT = os.getenv("EARLY_EXIT", "0") == "1"
+        self.EARLY_EXIT_CHUNK_SIZE = int(os.getenv("EARLY_EXIT_CHUNK_SIZE", "16"))
+        self.EARLY_EXIT_MIN_FRAMES = int(os.getenv("EARLY_EXIT_MIN_FRAMES", "16"))
+        self.EARLY_EXIT_Z = float(os.getenv("EARLY_EXIT_Z", "2.58"))  # ~99% two-sided
+
+        # Detection worker pool (the throughput lane when admission lanes are on)
+        self.DETECTION_WORKERS = int(os.getenv("DETECTION_WORKERS", "4"))
+        self.DETECTION_QUEUE_SIZE = int(os.getenv("DETECTION_QUEUE_SIZE", "16"))
+        self.RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "5"))
+
+        # Admission lanes: media up to FAST_LANE_MAX_SECONDS long (and, for video, up to
+        # FAST_LANE_MAX_PIXELS per frame) runs on its own low-latency pool, never behind long media
+        self.FAST_LANE_MAX_SECONDS = float(os.getenv("FAST_LANE_MAX_SECONDS", "30"))
+        self.FAST_LANE_MAX_PIXELS = int(os.getenv("FAST_LANE_MAX_PIXELS", str(1920 * 1080)))
+        self.FAST_LANE_WORKERS = int(os.getenv("FAST_LANE_WORKERS", "2"))
+        self.FAST_LANE_QUEUE_SIZE = int(os.getenv("FAST_LANE_QUEUE_SIZE", "32"))
+        # Within a lane cheaper media goes first; each media-second (x megapixels for video)
+        # of estimated cost counts as this many seconds of waiting, so big jobs still age in
+        self.ADMISSION_COST_WEIGHT = float(os.getenv("ADMISSION_COST_WEIGHT", "0.1"))
+
+        # Multi-process serving (python -m app.serve): one inference process holds the models and
+        # the API workers it starts score through it; app.serve sets both of these in the workers
+        self.INFERENCE_SERVER = os.getenv("INFERENCE_SERVER")  # Unix socket of the inference process
+        self.INFERENCE_AUTHKEY = os.getenv("INFERENCE_AUTHKEY", "")
+        self.SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "4"))
+
+        # Batch detection (/detect/batch); manifests may only reference files under BATCH_MANIFEST_ROOT
+        manifest_root = os.getenv("BATCH_MANIFEST_ROOT")
+        self.BATCH_MANIFEST_ROOT = Path(manifest_root).resolve() if manifest_root else None
+        self.BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+        self.BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", str(self.DETECTION_WORKERS)))
+        self.BATCH_RETRY_INTERVAL_SECONDS = 0.1
+
+        # Progressive results (/detect/stream): how often to check for a disconnected client
+        self.STREAM_DISCONNECT_POLL_SECONDS = 0.5
+
+        # Async jobs (/jobs): uploads and the SQLite job store live under JOB_DIR
+        self.JOB_DIR = Path(os.getenv("JOB_DIR", "jobs")).resolve()
+        self.JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+        self.JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 86400)))
+
+        # Result cache keyed by upload SHA-256 (RESULT_CACHE_DIR enables the on-disk tier)
+        self.RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+        self.RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+        self.RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "86400"))
+        self.RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR")
+        self.UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+        # Metrics: PROFILE_VIDEO_MODELS runs FaceForensics and Celeb-DF as separate
+        # (slower) calls so /metrics can time each one instead of the fused ensemble
+        self.PROFILE_VIDEO_MODELS = os.getenv("PROFILE_VIDEO_MODELS", "0") == "1"
+
+        # Tracing: TRACE=1 traces every request (or pass ?trace=true per request);
+        # traces are written as Chrome trace-event JSON to TRACE_DIR
+        self.TRACE = os.getenv("TRACE", "0") == "1"
+        self.TRACE_DIR = Path(os.getenv("TRACE_DIR", "traces")).resolve()
+
         # Thresholds
         self.VIDEO_THRESHOLD = 0.4
         self.AUDIO_THRESHOLD = 0.4
@@ -37,4 +144,48 @@ class Settings:
         self.TEMP_DIR = Path(os.getenv("TEMP_DIR", "temp_uploads")).resolve()
         self.TEMP_DIR.mkdir(exist_ok=True)
 
+    def _buckets(self, env: str, largest: int):
+        """Comma-separated sizes from env, else powers of two up to largest (at most 2x padding)."""
+        value = os.getenv(env)
+        if value:
+            return tuple(sorted({int(size) for size in value.split(",")}))
+        sizes = {largest}
+        size = 1
+        while size < largest:
+            sizes.add(size)
+            size *= 2
+        return tuple(sorted(sizes))
+
+    def model_path(self, name: str) -> Path:
+        """
+        Resolves a model file on first use instead of at import time.
+        Downloads from HF (cached in ~/.cache/huggingface) unless overridden by env.
+        """
+        path = self._model_paths.get(name)
+        if path is None:
+            path = hf_hub_download(repo_id=self.MODEL_REPO_ID, filename=self.MODEL_FILES[name])
+            self._model_paths[name] = path
+        return Path(path)
+
+    def tflite_model_path(self, name: str) -> Path:
+        return self.TFLITE_MODEL_DIR / f"{name}.tflite"
+
+    def serving_model_path(self, name: str) -> Path:
+        """The file INFERENCE_BACKEND actually loads for a model."""
+        if self.INFERENCE_BACKEND == "tflite":
+            return self.tflite_model_path(name)
+        return self.model_path(name)
+
+    @property
+    def VIDEO_MODEL_PATH(self):
+        return self.model_path("faceforensics")
+
+    @property
+    def VIDEO_MODEL_CDF_PATH(self):
+        return self.model_path("celebdf")
+
+    @property
+    def AUDIO_MODEL_PATH(self):
+        return self.model_path("audio")
+
 settings = Settings()
@@ -1,20 +1,48 @@
 import sys
 sys.path.append('.')
 import os
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import asyncio
+from fastapi import FastAPI, File, Form, UploadFile, HTTPException, Query, Request, Response
+from typing import List, Optional
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pathlib import Path
-import shutil
+import hashlib
+import json
+import threading
 import uuid
 import mimetypes
 import traceback
+import numpy as np
 
-from app.services.detection_service import DetectionService
-from app.schemas import DetectionResult
+from app.services.admission import Admission, FAST, SLOW
+from app.services.detection_service import DetectionService, AnalysisCancelled
+from app.services.job_runner import JobRunner
+from app.services.job_store import JobStore
+from app.services import tracing
+from app.services.metrics import registry, stage
+from app.services.model_manager import model_manager
+from app.models import backends
+from app.models.audio_model import audio_model
+from app.services.result_cache import ResultCache
+from app.services.worker_pool import WorkerPool, PoolSaturatedError, PoolClosedError
+from app.schemas import DetectionResult, JobStatus
 from app.config import settings
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI()
 detection_service = DetectionService()
+# Short media runs on its own pool so it never waits behind long uploads
+admission = Admission({
+    FAST: WorkerPool(workers=settings.FAST_LANE_WORKERS, queue_size=settings.FAST_LANE_QUEUE_SIZE, name="detection-fast"),
+    SLOW: WorkerPool(workers=settings.DETECTION_WORKERS, queue_size=settings.DETECTION_QUEUE_SIZE, name="detection"),
+})
+result_cache = ResultCache(
+    max_entries=settings.RESULT_CACHE_SIZE,
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+    cache_dir=settings.RESULT_CACHE_DIR
+)
+job_store = JobStore(settings.JOB_DIR / "jobs.sqlite3")
 
 origins = [
     "http://localhost:3000",  # Your frontend URL
@@ -32,63 +60,506 @@ app.add_middleware(
 )
 
 @app.post("/detect", response_model=DetectionResult)
-async def detect_deepfake(file: UploadFile = File(...)):
+async def detect_deepfake(
+    response: Response,
+    file: UploadFile = File(...),
+    mode: Optional[str] = Query(None, description="Video uploads: 'video' (frames only) or 'combined' (frames + audio track)"),
+    early_exit: Optional[bool] = Query(None, description="Stop scoring frames once the video verdict is statistically settled"),
+    trace: Optional[bool] = Query(None, description="Record a trace of this request to TRACE_DIR (default: the TRACE setting)")
+):
+    mode, early_exit = _resolve_options(mode, early_exit)
+    _check_ready()
+
+    media_type = _media_type(file.filename, mode)
+    temp_file_path = _temp_path(file.filename)
+
+    with tracing.start_trace("detect", enabled=trace, filename=file.filename, media_type=media_type) as request_trace:
+        if request_trace is not None:
+            response.headers["X-Trace-Id"] = request_trace.trace_id
+
+        try:
+            # Save uploaded file, hashing it on the way through
+            digest = await run_in_threadpool(_save_upload, file, temp_file_path)
+
+            # Confirm file saved correctly
+            if not temp_file_path.exists():
+                raise HTTPException(status_code=500, detail="File was not saved correctly.")
+
+            return await _detect_saved(temp_file_path, digest, media_type, early_exit)
+
+        finally:
+            if temp_file_path.exists():
+                temp_file_path.unlink()
+
+@app.post("/detect/batch")
+async def detect_batch(
+    files: Optional[List[UploadFile]] = File(None),
+    manifest: Optional[str] = Form(None, description="JSON list (or newline-separated) of server-local paths under BATCH_MANIFEST_ROOT"),
+    mode: Optional[str] = Query(None, description="Video uploads: 'video' (frames only) or 'combined' (frames + audio track)"),
+    early_exit: Optional[bool] = Query(None, description="Stop scoring frames once the video verdict is statistically settled")
+):
+    """
+    Detects many files in one request. Each DetectionResult is streamed back
+    as one NDJSON line as soon as it is ready, in completion order; lines
+    carry the item's index and filename so callers can match them up.
+    """
+    mode, early_exit = _resolve_options(mode, early_exit)
+    _check_ready()
+
+    paths = _parse_manifest(manifest) if manifest else []
+    files = files or []
+    if not files and not paths:
+        raise HTTPException(status_code=400, detail="Provide files and/or a manifest.")
+    if len(files) + len(paths) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BATCH_MAX_ITEMS} items per batch.")
+
+    # Uploads are saved before streaming starts: the form's files are closed
+    # once this handler returns
+    items = []
+    for file in files:
+        item = {"filename": file.filename, "path": None, "digest": None, "temp": True, "error": None}
+        try:
+            item["media_type"] = _media_type(file.filename, mode)
+            item["path"] = _temp_path(file.filename)
+            item["digest"] = await run_in_threadpool(_save_upload, file, item["path"])
+        except HTTPException as e:
+            item["error"] = e
+        items.append(item)
+
+    for path in paths:
+        item = {"filename": str(path), "path": path, "digest": None, "temp": False, "error": None}
+        try:
+            item["media_type"] = _media_type(path.name, mode)
+        except HTTPException as e:
+            item["error"] = e
+        items.append(item)
+
+    return StreamingResponse(_stream_batch(items, early_exit), media_type="application/x-ndjson")
+
+async def _stream_batch(items, early_exit: bool):
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+    async def run(index, item):
+        line = {"index": index, "filename": item["filename"]}
+        try:
+            if item["error"] is not None:
+                raise item["error"]
+            async with semaphore:
+                if item["digest"] is None:
+                    item["digest"] = await run_in_threadpool(_hash_file, item["path"])
+                # Batch items wait for pool capacity instead of being rejected
+                line["result"] = await _detect_saved(item["path"], item["digest"], item["media_type"], early_exit, wait=True)
+        except HTTPException as e:
+            line["error"] = e.detail
+            line["status_code"] = e.status_code
+        except Exception as e:
+            line["error"] = str(e)
+            line["status_code"] = 500
+        return line
+
+    # Items run concurrently so their frames share model batches in the scheduler
+    tasks = [asyncio.create_task(run(index, item)) for index, item in enumerate(items)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield json.dumps(await next_done) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for item in items:
+            if item["temp"] and item["path"] is not None and item["path"].exists():
+                item["path"].unlink()
+
+def _parse_manifest(manifest: str):
+    try:
+        entries = json.loads(manifest)
+    except ValueError:
+        entries = [line.strip() for line in manifest.splitlines() if line.strip()]
+    if not isinstance(entries, list) or not all(isinstance(entry, str) for entry in entries):
+        raise HTTPException(status_code=400, detail="Manifest must be a list of paths.")
+
+    if settings.BATCH_MANIFEST_ROOT is None:
+        raise HTTPException(status_code=400, detail="Server-local manifests are disabled (BATCH_MANIFEST_ROOT is not set).")
+
+    root = settings.BATCH_MANIFEST_ROOT
+    paths = []
+    for entry in entries:
+        path = (root / entry).resolve()
+        if not path.is_relative_to(root):
+            raise HTTPException(status_code=400, detail=f"Manifest path outside BATCH_MANIFEST_ROOT: {entry}")
+        if not path.is_file():
+            raise HTTPException(status_code=400, detail=f"Manifest path not found: {entry}")
+        paths.append(path)
+    return paths
+
+def _resolve_options(mode: Optional[str], early_exit: Optional[bool]):
+    mode = mode or settings.VIDEO_ANALYSIS_MODE
+    if mode not in ("video", "combined"):
+        raise HTTPException(status_code=400, detail="mode must be 'video' or 'combined'.")
+
+    if early_exit is None:
+        early_exit = settings.EARLY_EXIT
+    return mode, early_exit
+
+def _check_ready():
+    if not model_manager.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Models are still loading. Please retry shortly.",
+            headers={"Retry-After": str(settings.RETRY_AFTER_SECONDS)}
+        )
+
+def _temp_path(filename: str):
     # Ensure temp directory exists
     settings.TEMP_DIR.mkdir(exist_ok=True)
 
     # Sanitize and uniquify filename
-    safe_filename = f"{uuid.uuid4().hex}_{file.filename.replace(' ', '_')}"
-    temp_file_path = settings.TEMP_DIR / safe_filename
+    safe_filename = f"{uuid.uuid4().hex}_{Path(filename).name.replace(' ', '_')}"
+    return settings.TEMP_DIR / safe_filename
+
+async def _detect_saved(path: Path, digest: str, media_type: str, early_exit: bool, wait: bool = False):
+    """
+    Result cache lookup, coalescing with identical in-flight work, then the
+    worker pools. With wait, a full lane is retried instead of raising 429.
+    """
+    if not settings.RESULT_CACHE_ENABLED:
+        return await _run_on_pool(path, media_type, early_exit, wait=wait)
+
+    cache_key = f"{digest}-{media_type}" + ("-early" if early_exit else "")
+    model_version = model_manager.model_version
+
+    cached = result_cache.get(cache_key, model_version)
+    if cached is not None:
+        tracing.annotate(cache="hit")
+        return cached
+
+    # Identical uploads in flight share a single computation
+    future, is_leader = result_cache.claim(cache_key)
+    if not is_leader:
+        tracing.annotate(cache="coalesced")
+        return await asyncio.wrap_future(future)
 
     try:
-        # Save uploaded file
-        with temp_file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Confirm file saved correctly
-        if not temp_file_path.exists():
-            raise HTTPException(status_code=500, detail="File was not saved correctly.")
-
-        # Detect file type from MIME
-        mime_type, _ = mimetypes.guess_type(str(temp_file_path))
-
-        if mime_type is None:
-            raise HTTPException(status_code=400, detail="Could not determine file type.")
-
-        # Dispatch to correct service
-        if mime_type.startswith("video"):
-            results = detection_service.process_video(temp_file_path)
-        elif mime_type.startswith("audio"):
-            results = detection_service.process_audio(temp_file_path)
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file type. Upload a valid audio or video file.")
-
-        # Final fake detection verdict
-        is_fake = (
-            (results.get("video_confidence") is not None and results["video_confidence"] > settings.VIDEO_THRESHOLD)
-            or
-            (results.get("audio_confidence") is not None and results["audio_confidence"] > settings.AUDIO_THRESHOLD)
-        )
+        result = await _run_on_pool(path, media_type, early_exit, wait=wait)
+    except BaseException as e:
+        result_cache.fail(cache_key, e)
+        raise
+    result_cache.resolve(cache_key, result, model_version)
+    return result
 
-        return {
-            "video_confidence": results.get("video_confidence"),
-            "audio_confidence": results.get("audio_confidence"),
-            "is_fake": is_fake
-        }
+def _media_type(filename: str, mode: str = "video"):
+    # Detect file type from MIME
+    mime_type, _ = mimetypes.guess_type(filename)
+
+    if mime_type is None:
+        raise HTTPException(status_code=400, detail="Could not determine file type.")
 
+    if mime_type.startswith("video"):
+        return "combined" if mode == "combined" else "video"
+    if mime_type.startswith("audio"):
+        return "audio"
+    raise HTTPException(status_code=400, detail="Unsupported file type. Upload a valid audio or video file.")
+
+def _save_upload(file: UploadFile, path: Path):
+    digest = hashlib.sha256()
+    with stage("upload_copy"), path.open("wb") as buffer:
+        while chunk := file.file.read(settings.UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            buffer.write(chunk)
+    return digest.hexdigest()
+
+def _hash_file(path: Path):
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(settings.UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+async def _run_on_pool(path: Path, media_type: str, early_exit: bool = False, info: dict = None, wait: bool = False):
+    # Heavy work runs on the bounded worker pools so the event loop stays free
+    if info is None:
+        info = await run_in_threadpool(admission.probe, path, media_type)
+    while True:
+        try:
+            future = _submit(info, media_type, _run_detection, path, media_type, early_exit, info)
+            break
+        except HTTPException as e:
+            # Only the lane submit is retried: the probe and cache claim above are not repeated
+            if not wait or e.status_code != 429:
+                raise
+            await asyncio.sleep(settings.BATCH_RETRY_INTERVAL_SECONDS)
+    return await asyncio.wrap_future(future)
+
+def _submit(info: dict, media_type: str, fn, *args):
+    try:
+        return admission.submit(info, media_type, fn, *args)
+    except PoolSaturatedError:
+        raise HTTPException(
+            status_code=429,
+            detail="Server is busy. Please retry shortly.",
+            headers={"Retry-After": str(settings.RETRY_AFTER_SECONDS)}
+        )
+    except PoolClosedError:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is shutting down.",
+            headers={"Retry-After": str(settings.RETRY_AFTER_SECONDS)}
+        )
+
+def _run_detection(path: Path, media_type: str, early_exit: bool = False, info: dict = None):
+    try:
+        return detection_service.analyze(path, media_type, early_exit=early_exit, info=info)
     except Exception as e:
         print("ERROR:", e)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
 
-    finally:
+@app.post("/detect/stream")
+async def detect_stream(
+    request: Request,
+    file: UploadFile = File(...),
+    mode: Optional[str] = Query(None, description="Video uploads: 'video' (frames only) or 'combined' (frames + audio track)"),
+    early_exit: Optional[bool] = Query(None, description="Stop scoring frames once the video verdict is statistically settled")
+):
+    """
+    Server-sent events while the analysis runs: a "frames" event per scored
+    chunk of frames and an "audio" event per chunk of audio windows, each
+    with the chunk's scores and the running confidence, then a final
+    "result" (or "error") event. Disconnecting cancels the remaining work.
+    """
+    mode, early_exit = _resolve_options(mode, early_exit)
+    _check_ready()
+
+    media_type = _media_type(file.filename, mode)
+    temp_file_path = _temp_path(file.filename)
+
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def progress(stage, fraction, scores=None):
+        # Runs on the analysis threads; checked between chunks
+        if cancelled.is_set():
+            raise AnalysisCancelled()
+        loop.call_soon_threadsafe(events.put_nowait, (stage, fraction, scores))
+
+    try:
+        await run_in_threadpool(_save_upload, file, temp_file_path)
+        info = await run_in_threadpool(admission.probe, temp_file_path, media_type)
+        future = _submit(info, media_type, detection_service.analyze, temp_file_path, media_type, early_exit, progress, info)
+    except BaseException:
         if temp_file_path.exists():
             temp_file_path.unlink()
+        raise
+
+    # The upload is removed once the analysis thread is done with it
+    future.add_done_callback(lambda _: temp_file_path.unlink(missing_ok=True))
+
+    return StreamingResponse(
+        _stream_events(request, future, events, cancelled),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _stream_events(request: Request, future, events: asyncio.Queue, cancelled: threading.Event):
+    done = asyncio.wrap_future(future)
+    video_scores, audio_scores = [], []
+    pending_event = None
+
+    try:
+        while True:
+            if pending_event is None:
+                pending_event = asyncio.ensure_future(events.get())
+            finished, _ = await asyncio.wait(
+                {pending_event, done}, timeout=settings.STREAM_DISCONNECT_POLL_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if await request.is_disconnected():
+                return
+
+            if pending_event in finished:
+                stage, fraction, scores = pending_event.result()
+                pending_event = None
+                yield _sse(*_progress_event(stage, fraction, scores, video_scores, audio_scores))
+            elif done in finished:
+                # Progress events are queued before the future completes, so none are left
+                break
+
+        try:
+            yield _sse("result", done.result())
+        except Exception as e:
+            print("ERROR:", e)
+            yield _sse("error", {"detail": f"Detection failed: {str(e)}"})
+    finally:
+        # Client went away (or the stream ended): stop scoring at the next chunk
+        cancelled.set()
+        if pending_event is not None:
+            pending_event.cancel()
+
+def _progress_event(stage, fraction, scores, video_scores, audio_scores):
+    if scores is None:
+        return "progress", {"stage": stage, "progress": fraction}
+
+    scores = [float(score) for score in scores]
+    if stage == "audio":
+        audio_scores.extend(scores)
+        return "audio", {
+            "scores": scores,
+            "windows_scored": len(audio_scores),
+            "progress": fraction,
+            "audio_confidence": float(audio_model.aggregate(np.array(audio_scores)))
+        }
+
+    video_scores.extend(scores)
+    return "frames", {
+        "scores": scores,
+        "frames_scored": len(video_scores),
+        "progress": fraction,
+        "video_confidence": float(np.mean(video_scores))
+    }
+
+def _sse(event: str, data: dict):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    mode: Optional[str] = Query(None, description="Video uploads: 'video' (frames only) or 'combined' (frames + audio track)"),
+    early_exit: Optional[bool] = Query(None, description="Stop scoring frames once the video verdict is statistically settled")
+):
+    """
+    Queues a detection and returns its job id straight away; poll
+    GET /jobs/{job_id} for progress and the result.
+    """
+    mode, early_exit = _resolve_options(mode, early_exit)
+    media_type = _media_type(file.filename, mode)
+
+    # Uploads are kept under JOB_DIR (not TEMP_DIR) until the job finishes,
+    # so queued jobs can resume after a restart
+    job_id = uuid.uuid4().hex
+    media_path = settings.JOB_DIR / f"{job_id}_{Path(file.filename).name.replace(' ', '_')}"
+    try:
+        digest = await run_in_threadpool(_save_upload, file, media_path)
+    except BaseException:
+        if media_path.exists():
+            media_path.unlink()
+        raise
+
+    job_store.create(media_path, media_type, early_exit, filename=file.filename, digest=digest, job_id=job_id)
+    job_runner.submit(job_id)
+    return _job_status(job_store.get(job_id))
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return _job_status(job)
+
+def _job_status(job: dict):
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "filename": job["filename"],
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"]
+    }
+
+def _process_job(job: dict, progress):
+    media_path = Path(job["media_path"])
+    try:
+        # Jobs may be picked up before the models have finished loading
+        while not model_manager.wait_until_ready(timeout=1.0):
+            if model_manager.finished_at is not None:
+                raise RuntimeError("Model loading failed")
+
+        cache_key = f"{job['digest']}-{job['media_type']}" + ("-early" if job["early_exit"] else "")
+        model_version = model_manager.model_version
+        if settings.RESULT_CACHE_ENABLED and job["digest"]:
+            cached = result_cache.get(cache_key, model_version)
+            if cached is not None:
+                return cached
+
+        with tracing.start_trace("job", job_id=job["id"], filename=job["filename"], media_type=job["media_type"]):
+            result = detection_service.analyze(media_path, job["media_type"], early_exit=job["early_exit"], progress=progress)
+        if settings.RESULT_CACHE_ENABLED and job["digest"]:
+            result_cache.put(cache_key, result, model_version)
+        return result
+    finally:
+        if media_path.exists():
+            media_path.unlink()
+
+job_runner = JobRunner(job_store, _process_job, workers=settings.JOB_WORKERS)
+
+# Read at scrape time from the components that already track them
+registry.gauge("deepfake_models_ready", "1 once every model is loaded and warmed up.", lambda: int(model_manager.ready))
+registry.gauge(
+    "deepfake_pool_queue_depth", "Detections waiting for a worker, per admission lane.",
+    lambda: {(lane,): pool.queue_depth for lane, pool in admission.pools.items()}, labelnames=("lane",)
+)
+registry.gauge(
+    "deepfake_pool_in_flight", "Detections running, per admission lane.",
+    lambda: {(lane,): pool.in_flight for lane, pool in admission.pools.items()}, labelnames=("lane",)
+)
+registry.gauge(
+    "deepfake_pool_workers", "Worker pool size, per admission lane.",
+    lambda: {(lane,): pool.workers for lane, pool in admission.pools.items()}, labelnames=("lane",)
+)
+registry.counter("deepfake_admissions_total", "Detections admitted, per lane.", admission.admitted, labelnames=("lane",))
+registry.gauge("deepfake_scheduler_queue_depth", "Frame chunks waiting to be batched for the video model.", lambda: detection_service.video_scheduler.queue_depth)
+registry.gauge("deepfake_job_queue_depth", "Async jobs waiting for a job worker.", lambda: job_runner.queue_depth)
+registry.counter(
+    "deepfake_cache_lookups_total", "Result cache lookups by outcome.",
+    lambda: {(outcome,): result_cache.stats()[outcome] for outcome in ("hits", "misses", "coalesced")},
+    labelnames=("outcome",)
+)
+registry.counter(
+    "deepfake_model_traces_total", "Graph traces per model (TFLite: interpreters allocated per input shape); flat after warm-up.",
+    backends.trace_counts, labelnames=("model",)
+)
+registry.gauge("deepfake_cache_entries", "Results held in the in-memory cache.", lambda: result_cache.stats()["entries"])
+registry.gauge("deepfake_cache_in_flight", "Computations other identical requests are waiting on.", lambda: result_cache.stats()["in_flight"])
 
 @app.get("/api/health")
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/api/ready")
+def readiness_check():
+    status = model_manager.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/api/cache")
+def cache_stats():
+    return result_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+def load_models():
+    model_manager.start(background=settings.BACKGROUND_MODEL_LOADING)
+
+@app.on_event("startup")
+def resume_jobs():
+    # Forget old finished jobs, then pick up anything a previous run left unfinished
+    for media_path in job_store.delete_finished(settings.JOB_RETENTION_SECONDS):
+        if media_path.exists():
+            media_path.unlink()
+    # app.serve workers share the store; their parent requeued interrupted jobs once already
+    job_runner.start(recover=not settings.INFERENCE_SERVER)
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    for pool in admission.pools.values():
+        pool.shutdown(wait=False)
+    job_runner.shutdown(wait=False)
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
@@ -0,0 +1,129 @@
+import numpy as np
+import tensorflow as tf
+from keras.saving import register_keras_serializable
+from app.models.backends import record_trace
+
+# librosa.feature.mfcc defaults, which audio/src/a_preprocessing.extract_features relies on
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+TOP_DB = 80.0
+AMIN = 1e-10
+
+def _hz_to_mel(frequencies):
+    """Slaney mel scale (librosa's default, htk=False): linear below 1 kHz, log above."""
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    f_sp = 200.0 / 3
+    mels = frequencies / f_sp
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    log_mels = min_log_mel + np.log(np.maximum(frequencies, min_log_hz) / min_log_hz) / logstep
+    return np.where(frequencies >= min_log_hz, log_mels, mels)
+
+def _mel_to_hz(mels):
+    mels = np.asarray(mels, dtype=np.float64)
+    f_sp = 200.0 / 3
+    frequencies = f_sp * mels
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    log_frequencies = min_log_hz * np.exp(logstep * (mels - min_log_mel))
+    return np.where(mels >= min_log_mel, log_frequencies, frequencies)
+
+def mel_filterbank(sample_rate: int, n_fft: int = N_FFT, n_mels: int = N_MELS):
+    """
+    (1 + n_fft // 2, n_mels) weights equal to librosa.filters.mel(sr, n_fft,
+    n_mels) transposed: Slaney-scale triangles with Slaney area normalisation.
+    """
+    fft_freqs = np.linspace(0, sample_rate / 2, 1 + n_fft // 2)
+    mel_freqs = _mel_to_hz(np.linspace(_hz_to_mel(0.0), _hz_to_mel(sample_rate / 2), n_mels + 2))
+
+    fdiff = np.diff(mel_freqs)
+    ramps = mel_freqs[:, np.newaxis] - fft_freqs[np.newaxis, :]
+    lower = -ramps[:-2] / fdiff[:-1, np.newaxis]
+    upper = ramps[2:] / fdiff[1:, np.newaxis]
+    weights = np.maximum(0, np.minimum(lower, upper))
+
+    weights *= (2.0 / (mel_freqs[2:n_mels + 2] - mel_freqs[:n_mels]))[:, np.newaxis]
+    return weights.T.astype(np.float32)
+
+def dct_matrix(n_mfcc: int, n_mels: int = N_MELS):
+    """
+    (n_mels, n_mfcc) orthonormal DCT-II basis, the first n_mfcc columns of
+    scipy.fft.dct(type=2, norm="ortho"). A matmul instead of tf.signal.dct
+    keeps the graph on TFLite builtin ops and skips the unused coefficients.
+    """
+    n = np.arange(n_mels)[:, np.newaxis]
+    k = np.arange(n_mfcc)[np.newaxis, :]
+    basis = np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)
+    basis[:, 0] /= np.sqrt(2.0)
+    return basis.astype(np.float32)
+
+@register_keras_serializable()
+class MfccLayer(tf.keras.layers.Layer):
+    """
+    Raw PCM (batch, samples) at sample_rate to the audio model's input
+    (batch, steps, n_mfcc, 1), computed in-graph with tf.signal.
+
+    Matches librosa.feature.mfcc(y, sr, n_mfcc) per clip:
+    - centred STFT, zero-padded, periodic Hann window
+    - power spectrum through a Slaney mel filterbank
+    - power_to_db with an 80 dB floor below the clip's peak
+    - orthonormal DCT-II
+    Then zero-padded or truncated to steps, as in extract_features.
+    """
+
+    def __init__(self, sample_rate: int = 16000, n_mfcc: int = 40, steps: int = 100, **kwargs):
+        super().__init__(**kwargs)
+        self.sample_rate = sample_rate
+        self.n_mfcc = n_mfcc
+        self.steps = steps
+        self.mel_weights = tf.constant(mel_filterbank(sample_rate))
+        self.dct_weights = tf.constant(dct_matrix(n_mfcc))
+
+    def call(self, pcm):
+        pcm = tf.convert_to_tensor(pcm, tf.float32)
+        # center=True: pad n_fft // 2 zeros on both sides
+        padded = tf.pad(pcm, [[0, 0], [N_FFT // 2, N_FFT // 2]])
+        stft = tf.signal.stft(
+            padded, frame_length=N_FFT, frame_step=HOP_LENGTH, fft_length=N_FFT,
+            window_fn=tf.signal.hann_window, pad_end=False
+        )
+        power = tf.math.real(stft) ** 2 + tf.math.imag(stft) ** 2
+        mel = tf.tensordot(power, self.mel_weights, axes=1)
+
+        log_mel = 10.0 * tf.math.log(tf.maximum(mel, AMIN)) / tf.math.log(10.0)
+        peak = tf.reduce_max(log_mel, axis=[1, 2], keepdims=True)
+        log_mel = tf.maximum(log_mel, peak - TOP_DB)
+
+        mfcc = tf.tensordot(log_mel, self.dct_weights, axes=1)
+
+        # Pad / truncate the time axis like extract_features
+        mfcc = mfcc[:, :self.steps]
+        mfcc = tf.pad(mfcc, [[0, 0], [0, self.steps - tf.shape(mfcc)[1]], [0, 0]])
+        return tf.reshape(mfcc, [-1, self.steps, self.n_mfcc, 1])
+
+    def get_config(self):
+        config = super().get_config()
+        config.update({"sample_rate": self.sample_rate, "n_mfcc": self.n_mfcc, "steps": self.steps})
+        return config
+
+def with_frontend(model, sample_rate: int, n_mfcc: int, steps: int):
+    """The MFCC-input audio model with MfccLayer in front: raw PCM in, scores out."""
+    pcm = tf.keras.Input(shape=(None,), dtype=tf.float32, name="pcm")
+    features = MfccLayer(sample_rate=sample_rate, n_mfcc=n_mfcc, steps=steps, name="mfcc")(pcm)
+    return tf.keras.Model(pcm, model(features), name=f"{model.name}_pcm")
+
+def compile_pcm_model(model):
+    """
+    model (raw PCM in) as one traced graph returning NumPy. Run eagerly the
+    front end's ops cost more in dispatch than the STFT itself; the
+    (None, None) signature means any batch and window length share a trace.
+    """
+    def traced(pcm):
+        record_trace("audio")  # Python side effect: runs only while tracing
+        return model(pcm, training=False)
+
+    fn = tf.function(traced, input_signature=[tf.TensorSpec([None, None], tf.float32)])
+    return lambda batch: fn(batch).numpy()
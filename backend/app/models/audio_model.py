@@ -1,24 +1,190 @@
-from tensorflow.keras.models import load_model
+import threading
 from app.config import settings
+from app.models import backends
+from app.services.inference_server import inference_client
+from app.services.metrics import stage
+from app.utils import audio_utils
 import numpy as np
-import librosa
+
+# librosa's default MFCC hop; the model sees windows of 100 MFCC time steps
+HOP_LENGTH = 512
+WINDOW_STEPS = 100
+# Samples that produce exactly WINDOW_STEPS frames with librosa's centred STFT
+WINDOW_SAMPLES = (WINDOW_STEPS - 1) * HOP_LENGTH
 
 class AudioModel:
     def __init__(self):
-        self.model = load_model(settings.AUDIO_MODEL_PATH)
-        
-    def predict(self, audio_path):
-        y, sr = librosa.load(audio_path, sr=settings.AUDIO_SAMPLE_RATE)
-        mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=settings.N_MFCC)
-        mfcc = mfcc.T  # Now shape: (time_steps, 40)
+        # Weights are loaded by the model manager at startup (or lazily on first use)
+        self.model = None
+        self._predict = None
+        self._load_lock = threading.Lock()
 
-        # Pad/truncate to 100 time steps
-        if mfcc.shape[0] < 100:
-            mfcc = np.pad(mfcc, ((0, 100 - mfcc.shape[0]),(0, 0)))
+    @property
+    def is_loaded(self):
+        return self.model is not None
+
+    def load(self):
+        with self._load_lock:
+            if self.model is None:
+                model = backends.load("audio", self._load_keras)
+                if settings.AUDIO_FRONTEND == "tf" and not backends.takes_pcm(model):
+                    if isinstance(model, backends.TFLiteBackend):
+                        print("AUDIO_FRONTEND=tf needs an audio model exported with --audio-frontend; using librosa MFCCs")
+                    else:
+                        from app.models.audio_frontend import with_frontend
+                        model = with_frontend(model, settings.AUDIO_SAMPLE_RATE, settings.N_MFCC, WINDOW_STEPS)
+                self._predict = self._compile(model)
+                self.model = model
+
+    def _compile(self, model):
+        if backends.takes_pcm(model) and not isinstance(model, backends.TFLiteBackend):
+            from app.models.audio_frontend import compile_pcm_model
+            return compile_pcm_model(model)
+        return lambda batch: backends.predict(model, batch)
+
+    def _load_keras(self, path):
+        # Lazy, like VideoModel._load_keras
+        from tensorflow.keras.models import load_model
+        return load_model(path)
+
+    @property
+    def takes_pcm(self):
+        """True when the loaded model computes its own MFCCs from raw PCM windows."""
+        if inference_client.enabled:
+            return inference_client.info()["audio_takes_pcm"]
+        return self.is_loaded and backends.takes_pcm(self.model)
+
+    def warm_up(self):
+        """Runs every batch bucket once so no request pays for a trace."""
+        self.load()
+        window_shape = (WINDOW_SAMPLES,) if self.takes_pcm else (WINDOW_STEPS, settings.N_MFCC, 1)
+        backends.pin(self.model, [(size,) + window_shape for size in settings.AUDIO_BATCH_BUCKETS])
+        for size in settings.AUDIO_BATCH_BUCKETS:
+            self._score(np.zeros((size,) + window_shape, dtype=np.float32))
+
+    def predict(self, audio):
+        """
+        audio: path to an audio file, or float32 / int16 PCM already at AUDIO_SAMPLE_RATE.
+        Scores overlapping 100-step MFCC windows across the whole track in one
+        batched call and aggregates them (AUDIO_WINDOW_AGGREGATE).
+        """
+        return self.aggregate(self.window_scores(audio))
+
+    def aggregate(self, scores):
+        """Track-level score from window scores (AUDIO_WINDOW_AGGREGATE)."""
+        if settings.AUDIO_WINDOW_AGGREGATE == "max":
+            return scores.max()
+        return scores.mean()
+
+    def window_scores(self, audio):
+        """Per-window fake probabilities, in track order."""
+        return np.concatenate(list(self.iter_window_scores(audio)))
+
+    def iter_window_scores(self, audio, chunk_size: int = None):
+        """
+        Like window_scores, but scores chunk_size windows per model call and
+        yields each chunk's scores as soon as it is ready (all windows in one
+        call by default).
+        """
+        if not self.is_loaded and not inference_client.enabled:
+            self.load()
+
+        with stage("audio_load"):
+            segments = self._load_windows(audio)
+        chunk_size = chunk_size or len(segments)
+        for i in range(0, len(segments), chunk_size):
+            if self.takes_pcm:
+                # MFCCs are computed inside the model
+                with stage("audio_model"):
+                    scores = self._score_pcm(segments[i:i + chunk_size])
+            else:
+                with stage("audio_features"):
+                    batch = self._features(segments[i:i + chunk_size])
+                with stage("audio_model"):
+                    scores = self._score(batch)
+            yield scores
+
+    def window_starts(self, num_samples: int):
+        """
+        Window offsets in MFCC time steps. Windows advance by AUDIO_WINDOW_STRIDE,
+        plus one aligned to the end of the track; if that would exceed
+        AUDIO_MAX_WINDOWS they are spread evenly over the track instead, so
+        cost stays bounded but late splices are still seen.
+        """
+        total_steps = 1 + num_samples // HOP_LENGTH
+        if total_steps <= WINDOW_STEPS:
+            return [0]
+
+        last_start = total_steps - WINDOW_STEPS
+        starts = list(range(0, last_start + 1, settings.AUDIO_WINDOW_STRIDE))
+        if starts[-1] != last_start:
+            starts.append(last_start)  # Cover the tail of the track too
+
+        if len(starts) <= settings.AUDIO_MAX_WINDOWS:
+            return starts
+        return [int(round(s)) for s in np.linspace(0, last_start, settings.AUDIO_MAX_WINDOWS)]
+
+    def _load_windows(self, audio):
+        sr = settings.AUDIO_SAMPLE_RATE
+
+        if not isinstance(audio, np.ndarray):
+            # Already-conformant 16 kHz mono int16 WAVs are memory-mapped, not decoded
+            pcm = audio_utils.read_pcm16_wav(audio)
+            if pcm is not None:
+                audio = pcm
+
+        if isinstance(audio, np.ndarray):
+            starts = self.window_starts(len(audio))
+            return [self._as_float(audio[s * HOP_LENGTH:s * HOP_LENGTH + WINDOW_SAMPLES]) for s in starts]
+
+        # Decode only the spans the windows cover
+        import librosa
+        num_samples = int(librosa.get_duration(path=str(audio)) * sr)
+        starts = self.window_starts(num_samples)
+        return [
+            librosa.load(audio, sr=sr, offset=s * HOP_LENGTH / sr, duration=WINDOW_SAMPLES / sr)[0]
+            for s in starts
+        ]
+
+    def _as_float(self, segment):
+        # Only the windowed slices of int16 PCM are ever converted
+        if segment.dtype == np.int16:
+            return segment.astype(np.float32) / 32768.0
+        return segment
+
+    def _features(self, segments):
+        """(windows, 100, N_MFCC, 1) model input, padded/truncated like the training features."""
+        import librosa
+        sr = settings.AUDIO_SAMPLE_RATE
+        if len({len(segment) for segment in segments}) == 1:
+            # The mel spectrogram is batched, but the dB conversion clamps top_db against each
+            # window's own peak, as mfcc(y=window) and training's per-clip extract_features do
+            mel = librosa.feature.melspectrogram(y=np.stack(segments), sr=sr)
+            log_mel = np.stack([librosa.power_to_db(window) for window in mel])
+            mfccs = librosa.feature.mfcc(S=log_mel, n_mfcc=settings.N_MFCC)
         else:
-            mfcc = mfcc[:100, :]
-    
-        mfcc = np.expand_dims(mfcc, axis=(0, -1))  # Add batch and channel dims
-        return self.model.predict(mfcc)[0][0]
+            mfccs = [librosa.feature.mfcc(y=segment, sr=sr, n_mfcc=settings.N_MFCC) for segment in segments]
+
+        # Pad/truncate to 100 time steps
+        batch = np.zeros((len(segments), WINDOW_STEPS, settings.N_MFCC), dtype=np.float32)
+        for i, mfcc in enumerate(mfccs):
+            steps = min(WINDOW_STEPS, mfcc.shape[1])
+            batch[i, :steps] = mfcc[:, :steps].T
+        return batch[..., np.newaxis]  # Add channel dim
+
+    def _score(self, batch):
+        if inference_client.enabled:
+            # Under app.serve the weights live in the inference process, which buckets the batch
+            return inference_client.score("audio", batch)
+        return backends.run_bucketed(self._predict, batch, settings.AUDIO_BATCH_BUCKETS)[:, 0]
+
+    def _score_pcm(self, segments):
+        """Scores raw windows, one model call per distinct window length (only a decoded tail can be shorter)."""
+        scores = np.empty(len(segments), dtype=np.float32)
+        for length in {len(segment) for segment in segments}:
+            index = [i for i, segment in enumerate(segments) if len(segment) == length]
+            batch = np.stack([segments[i] for i in index]).astype(np.float32, copy=False)
+            scores[index] = self._score(batch)
+        return scores
 
 audio_model = AudioModel()
@@ -0,0 +1,159 @@
+import bisect
+import threading
+from pathlib import Path
+import numpy as np
+from app.config import settings
+
+# Graph traces per model (for TFLite: interpreters allocated for a new input
+# shape). Grows during warm-up, then stays flat while traffic fits the buckets.
+_trace_counts = {}
+_trace_lock = threading.Lock()
+
+def record_trace(name: str):
+    with _trace_lock:
+        _trace_counts[name] = _trace_counts.get(name, 0) + 1
+
+def trace_counts():
+    with _trace_lock:
+        return {(name,): count for name, count in _trace_counts.items()}
+
+def run_bucketed(fn, batch: np.ndarray, buckets):
+    """
+    fn over batch in bucket-sized calls only: split at the largest bucket,
+    zero-pad the remainder up to the next bucket and drop the padded rows'
+    outputs. fn must be row-wise (no cross-sample ops at inference).
+    """
+    largest = buckets[-1]
+    outputs = []
+    for start in range(0, len(batch), largest):
+        piece = batch[start:start + largest]
+        size = buckets[bisect.bisect_left(buckets, len(piece))]
+        if size != len(piece):
+            padding = np.zeros((size - len(piece),) + piece.shape[1:], dtype=piece.dtype)
+            outputs.append(fn(np.concatenate([piece, padding]))[:len(piece)])
+        else:
+            outputs.append(fn(piece))
+    return outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+def _interpreter_class():
+    # LiteRT is the standalone TFLite runtime; tf.lite.Interpreter is its deprecated alias
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        import tensorflow as tf
+        return tf.lite.Interpreter
+
+class TFLiteBackend:
+    """
+    A converted .tflite model (see tools/export_tflite.py) behind the same
+    float-in / float-out contract as the Keras model it replaces. Handles
+    any input shape (batch size, and window length for raw-PCM audio
+    models), and quantised int8 inputs or outputs if the model was exported
+    with them.
+
+    Each input shape gets its own interpreter, allocated once, so bucketed
+    batches alternate between ready interpreters instead of re-planning
+    tensors on every size change. The weights are in the memory-mapped
+    model file, shared by all of them; only the activation arenas are per
+    shape. Shapes passed to pin() (the warmed batch buckets) are kept for
+    good; of the others (e.g. the odd length of a short clip's PCM) the
+    max_shapes most recently used are kept.
+    """
+
+    def __init__(self, model_path, num_threads: int = None, name: str = None, max_shapes: int = 8):
+        self.model_path = str(model_path)
+        self.name = name or Path(model_path).stem
+        self.num_threads = num_threads or settings.TFLITE_NUM_THREADS
+        self.max_shapes = max_shapes
+        interpreter = self._interpreter()
+        self._input_signature = interpreter.get_input_details()[0]["shape_signature"]
+        self._interpreters = {tuple(interpreter.get_input_details()[0]["shape"]): interpreter}
+        self._pinned = {}
+        # Interpreters are not thread-safe, so calls take turns
+        self._lock = threading.Lock()
+
+    @property
+    def input_shape(self):
+        return tuple(int(d) for d in self._input_signature[1:])
+
+    def _interpreter(self, shape=None):
+        interpreter = _interpreter_class()(model_path=self.model_path, num_threads=self.num_threads)
+        if shape is not None:
+            interpreter.resize_tensor_input(interpreter.get_input_details()[0]["index"], shape)
+            record_trace(self.name)
+        interpreter.allocate_tensors()
+        return interpreter
+
+    def pin(self, shape):
+        """Allocates an interpreter for shape now and never evicts it."""
+        shape = tuple(shape)
+        with self._lock:
+            if shape not in self._pinned:
+                interpreter = self._interpreters.pop(shape, None)
+                self._pinned[shape] = interpreter if interpreter is not None else self._interpreter(shape)
+
+    def __call__(self, batch: np.ndarray):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            interpreter = self._pinned.get(batch.shape)
+            if interpreter is None:
+                interpreter = self._interpreters.pop(batch.shape, None)
+                if interpreter is None:
+                    if len(self._interpreters) >= self.max_shapes:
+                        del self._interpreters[next(iter(self._interpreters))]  # Least recently used
+                    interpreter = self._interpreter(batch.shape)
+                self._interpreters[batch.shape] = interpreter
+
+            input_details = interpreter.get_input_details()[0]
+            output_details = interpreter.get_output_details()[0]
+            interpreter.set_tensor(input_details["index"], self._quantize(batch, input_details))
+            interpreter.invoke()
+            return self._dequantize(interpreter.get_tensor(output_details["index"]), output_details)
+
+    def _quantize(self, batch, details):
+        if details["dtype"] == np.float32:
+            return batch
+        scale, zero_point = details["quantization"]
+        info = np.iinfo(details["dtype"])
+        return np.clip(np.rint(batch / scale + zero_point), info.min, info.max).astype(details["dtype"])
+
+    def _dequantize(self, values, details):
+        if details["dtype"] == np.float32:
+            return values.copy()
+        scale, zero_point = details["quantization"]
+        return (values.astype(np.float32) - zero_point) * scale
+
+def load(name: str, keras_loader):
+    """
+    The model called name ("faceforensics", "celebdf" or "audio") on the
+    configured INFERENCE_BACKEND. keras_loader(path) loads the Keras one.
+    """
+    if settings.INFERENCE_BACKEND == "tflite":
+        return TFLiteBackend(settings.tflite_model_path(name), name=name)
+    if settings.INFERENCE_BACKEND == "keras":
+        return keras_loader(settings.model_path(name))
+    raise ValueError(f"Unknown inference backend: {settings.INFERENCE_BACKEND}")
+
+def pin(model, shapes):
+    """Keeps an interpreter per shape for good on the TFLite backend; Keras needs nothing."""
+    if isinstance(model, TFLiteBackend):
+        for shape in shapes:
+            model.pin(shape)
+
+def takes_pcm(model):
+    """True for an audio model with the MFCC front end built in: (batch, samples) input."""
+    if isinstance(model, TFLiteBackend):
+        return len(model.input_shape) == 1
+    return len(model.input_shape) == 2
+
+def predict(model, batch):
+    """Scores a float32 batch on either backend, returning a NumPy array."""
+    if isinstance(model, TFLiteBackend):
+        return model(batch)
+    return model(batch, training=False).numpy()
@@ -0,0 +1,10 @@
+import tensorflow as tf
+from keras.saving import register_keras_serializable
+
+@register_keras_serializable()
+def focal_loss_fixed(y_true, y_pred, gamma=2.0, alpha=0.25):
+    epsilon = 1e-8
+    y_pred = tf.clip_by_value(y_pred, epsilon, 1. - epsilon)
+    cross_entropy = -y_true * tf.math.log(y_pred)
+    loss = alpha * tf.pow(1. - y_pred, gamma) * cross_entropy
+    return tf.reduce_mean(tf.reduce_sum(loss, axis=1))
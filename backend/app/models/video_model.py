@@ -1,57 +1,142 @@
+import threading
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-from keras.saving import register_keras_serializable
 from app.config import settings
+from app.models import backends
+from app.services import tracing
+from app.services.inference_server import inference_client
+from app.services.metrics import stage
 
-@register_keras_serializable()
-def focal_loss_fixed(y_true, y_pred, gamma=2.0, alpha=0.25):
-    epsilon = 1e-8
-    y_pred = tf.clip_by_value(y_pred, epsilon, 1. - epsilon)
-    cross_entropy = -y_true * tf.math.log(y_pred)
-    loss = alpha * tf.pow(1. - y_pred, gamma) * cross_entropy
-    return tf.reduce_mean(tf.reduce_sum(loss, axis=1))
+# TensorFlow is imported only where models are loaded or traced, so app.serve
+# workers, which never hold weights, do not pay its memory
 
 class VideoModel:
     def __init__(self):
-        self.model = load_model(
-            settings.VIDEO_MODEL_PATH,
-            custom_objects={'focal_loss_fixed': focal_loss_fixed}
-        )
-
-        self.modelCdf = load_model(
-            settings.VIDEO_MODEL_CDF_PATH,
-            custom_objects={'focal_loss_fixed': focal_loss_fixed}
-        )
-        
-    def predict(self, frames):
-        print(f"🔍 DEBUG - Input frames shape: {frames.shape}")
-        print(f"🔍 DEBUG - Input frames dtype: {frames.dtype}")
-        print(f"🔍 DEBUG - Input frames range: {frames.min()} to {frames.max()}")
+        # Weights are loaded by the model manager at startup (or lazily on first use)
+        self.model = None
+        self.modelCdf = None
+        self._ensemble = None
+        self._load_lock = threading.Lock()
 
-        if frames.dtype != np.float32:
-            frames = frames.astype('float32')
+    @property
+    def is_loaded(self):
+        return self._ensemble is not None
+
+    def load_faceforensics(self):
+        self.model = backends.load("faceforensics", self._load_keras)
+
+    def load_celebdf(self):
+        self.modelCdf = backends.load("celebdf", self._load_keras)
+
+    def _load_keras(self, path):
+        from tensorflow.keras.models import load_model
+        from app.models.losses import focal_loss_fixed
+        return load_model(path, custom_objects={'focal_loss_fixed': focal_loss_fixed})
 
-        if frames.max() > 1.0:
-            frames = frames / 255.0
+    def load(self):
+        with self._load_lock:
+            if self.is_loaded:
+                return
+            if self.model is None:
+                self.load_faceforensics()
+            if self.modelCdf is None:
+                self.load_celebdf()
+            self._ensemble = self._build_ensemble()
 
-        print(f"🔍 DEBUG - After preprocessing range: {frames.min()} to {frames.max()}")
+    def warm_up(self):
+        """Traces the ensemble graph for every batch bucket so no request pays for a trace."""
+        self.load()
+        shapes = [(size,) + tuple(settings.INPUT_SHAPE) for size in settings.VIDEO_BATCH_BUCKETS]
+        backends.pin(self.model, shapes)
+        backends.pin(self.modelCdf, shapes)
+        for size in settings.VIDEO_BATCH_BUCKETS:
+            self.score(np.zeros((size,) + tuple(settings.INPUT_SHAPE), dtype=np.uint8))
 
-        pred1 = self.model.predict(frames)
-        pred2 = self.modelCdf.predict(frames)
+    def _build_ensemble(self):
+        """
+        Single compiled graph for both branches: uint8 frames go in once,
+        normalisation, FaceForensics, Celeb-DF and the average all run in-graph.
+        It is traced once per batch bucket, with static shapes, rather than
+        once with an unknown batch dimension.
+        On the TFLite backend the two interpreters run back to back instead.
+        """
+        model, model_cdf = self.model, self.modelCdf
+        if isinstance(model, backends.TFLiteBackend):
+            def tflite_ensemble(frames):
+                x = frames.astype(np.float32) / 255.0
+                return self._head((model(x) + model_cdf(x)) / 2.0)
+            return tflite_ensemble
 
-        print(f"🔍 DEBUG - Raw predictions model1: {pred1}")
-        print(f"🔍 DEBUG - Raw predictions model2: {pred2}")
+        import tensorflow as tf
 
-        avg_pred = (pred1 + pred2) / 2.0
+        @tf.function
+        def ensemble(frames):
+            backends.record_trace("video_ensemble")  # Python side effect: runs only while tracing
+            x = tf.cast(frames, tf.float32) / 255.0
+            avg_pred = (model(x, training=False) + model_cdf(x, training=False)) / 2.0
 
-        if avg_pred.shape[1] == 2:
-            fake_probability = avg_pred[:, 1].mean()
-            print(f"🔍 DEBUG - Averaged fake probability: {fake_probability}")
-            return fake_probability
+            if avg_pred.shape[-1] == 2:
+                return avg_pred[:, 1]
+            return tf.reduce_mean(avg_pred, axis=-1)
+
+        return lambda frames: ensemble(tf.convert_to_tensor(frames)).numpy()
+
+    def _head(self, avg_pred):
+        # Fake-class probability, as in the ensemble graph
+        if avg_pred.shape[-1] == 2:
+            return avg_pred[:, 1]
+        return avg_pred.mean(axis=-1)
+
+    def predict(self, frames):
+        return self.predict_frames(frames).mean()
+
+    def predict_frames(self, frames):
+        """Per-frame fake probability for a raw frame batch."""
+        return self.score(self.preprocess(frames))
+
+    def preprocess(self, frames):
+        """
+        Brings any frame batch to the uint8 layout the ensemble graph takes.
+        uint8 frames (the extract_frames output) pass through untouched.
+        """
+        if frames.dtype == np.uint8:
+            return frames
+
+        with stage("video_preprocess"):
+            frames = frames.astype('float32')
+            if frames.max() <= 1.0:
+                frames = frames * 255.0
+            return np.clip(np.rint(frames), 0, 255).astype(np.uint8)
+
+    def score(self, frames):
+        """
+        Per-frame fake probability for a preprocessed uint8 batch.
+        Batches may mix frames from several requests, so this must stay row-wise.
+        """
+        if inference_client.enabled:
+            # Under app.serve the weights live in the inference process
+            return inference_client.score("video", frames)
+        if not self.is_loaded:
+            self.load()
+
+        if settings.PROFILE_VIDEO_MODELS:
+            scores = backends.run_bucketed(self._score_per_model, frames, settings.VIDEO_BATCH_BUCKETS)
         else:
-            result = avg_pred.mean()
-            print(f"🔍 DEBUG - Averaged mean prediction: {result}")
-            return result
+            with stage("video_ensemble"):
+                scores = backends.run_bucketed(self._ensemble, frames, settings.VIDEO_BATCH_BUCKETS)
+                tracing.annotate(batch=len(frames))
+        return scores
+
+    def _score_per_model(self, frames):
+        """
+        Unfused scoring that times FaceForensics and Celeb-DF separately.
+        Slower than the ensemble graph; only for finding which branch is slow.
+        """
+        x = frames.astype(np.float32) / 255.0
+        with stage("faceforensics_model"):
+            pred = backends.predict(self.model, x)
+        with stage("celebdf_model"):
+            pred_cdf = backends.predict(self.modelCdf, x)
+
+        return self._head((pred + pred_cdf) / 2.0)
 
 video_model = VideoModel()
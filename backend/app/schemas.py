@@ -8,3 +8,17 @@ class DetectionResult(BaseModel):
     video_confidence: Optional[float] = None
     audio_confidence: Optional[float] = None
     is_fake: bool
+    frames_analyzed: Optional[int] = None  # Frames actually scored (fewer than frames_total on early exit)
+    frames_total: Optional[int] = None
+    dedup_ratio: Optional[float] = None  # Share of the analysed frames scored via a near-duplicate instead of the models
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str  # queued, running, done or failed
+    stage: Optional[str] = None  # decoding, scoring, audio, ...
+    progress: float = 0.0
+    filename: Optional[str] = None
+    result: Optional[DetectionResult] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
@@ -0,0 +1,64 @@
+"""
+Multi-worker serving with a single copy of the model weights.
+
+Plain `uvicorn --workers N` loads both ResNet50s and the audio model in
+every worker, multiplying memory and cold start by N. Loading once and
+forking would share the weights copy-on-write, but TensorFlow is not
+fork-safe: its thread pools and runtime state do not survive a fork.
+So instead:
+- one inference process (spawned) loads, warms and owns the models
+- N uvicorn workers (spawned, no weights) decode media and send frame /
+  MFCC batches to it through memory-mapped files on tmpfs, getting the
+  scores back over a Unix socket (app.services.inference_server)
+
+Weights are paid for once whatever N is, and frames from all workers
+are batched together in the inference process.
+
+Run from the backend directory:
+    python -m app.serve --workers 4 --port 8000
+"""
+import argparse
+import multiprocessing
+import os
+import secrets
+import shutil
+import tempfile
+from pathlib import Path
+
+import uvicorn
+
+from app.config import settings
+from app.services import inference_server
+from app.services.job_store import JobStore
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=settings.SERVE_WORKERS)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    args = parser.parse_args()
+
+    # Socket and batch buffers; tmpfs where available so buffers never touch disk
+    run_dir = Path(tempfile.mkdtemp(prefix="deepfake-serve-", dir="/dev/shm" if Path("/dev/shm").is_dir() else None))
+    address = str(run_dir / "inference.sock")
+    authkey = secrets.token_hex(32)
+
+    # Workers share the job store, so interrupted jobs are requeued here, once
+    JobStore(settings.JOB_DIR / "jobs.sqlite3").requeue_interrupted()
+
+    server = multiprocessing.get_context("spawn").Process(
+        target=inference_server.run, args=(address, authkey), name="inference-server"
+    )
+    server.start()
+    try:
+        # Set only now: the inference process must load the models itself
+        os.environ["INFERENCE_SERVER"] = address
+        os.environ["INFERENCE_AUTHKEY"] = authkey
+        uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        server.terminate()
+        server.join()
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
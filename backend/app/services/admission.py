@@ -0,0 +1,110 @@
+import contextvars
+import threading
+import time
+from pathlib import Path
+
+import cv2
+
+from app.config import settings
+from app.services import tracing
+from app.services.metrics import stage
+from app.utils import audio_utils, media_utils
+
+FAST = "fast"
+SLOW = "slow"
+
+# Batching priority on the shared InferenceScheduler: fast-lane frames fill batches first.
+# Work that never went through admission (async jobs) counts as slow
+LANE_PRIORITY = {FAST: 0, SLOW: 1}
+_lane = contextvars.ContextVar("admission_lane", default=SLOW)
+
+def scheduler_priority():
+    """Priority of the calling request's lane, for InferenceScheduler.submit."""
+    return LANE_PRIORITY[_lane.get()]
+
+def _run_in_lane(lane: str, fn, *args):
+    # WorkerPool runs each item in its own copy of the submitter's context
+    _lane.set(lane)
+    return fn(*args)
+
+class Admission:
+    """
+    Sorts detections into lanes before they queue. Every upload is probed
+    once for duration and resolution: short audio and short, modest-
+    resolution video go to the fast lane, everything else (including media
+    that could not be probed) to the slow one. Each lane is its own
+    WorkerPool, so a 30-minute 4K video can only ever hold slow-lane
+    workers, and within a lane cheaper media is dequeued first.
+    """
+
+    def __init__(self, pools: dict):
+        self.pools = pools
+        self._admitted = {lane: 0 for lane in pools}
+        self._lock = threading.Lock()
+
+    def probe(self, path: Path, media_type: str):
+        """Duration and frame size, from the WAV header or ffprobe (OpenCV if ffprobe fails)."""
+        with stage("admission_probe"):
+            if media_type == "audio":
+                pcm = audio_utils.read_pcm16_wav(path)
+                if pcm is not None:
+                    return {"duration": len(pcm) / settings.AUDIO_SAMPLE_RATE, "width": None, "height": None}
+            try:
+                return media_utils.probe(path)
+            except Exception:
+                pass  # No ffprobe, or a file it cannot read: fall back below
+            if media_type == "audio":
+                return {"duration": None, "width": None, "height": None}
+            return self._probe_opencv(path)
+
+    def _probe_opencv(self, path: Path):
+        capture = cv2.VideoCapture(str(path))
+        try:
+            if not capture.isOpened():
+                return {"duration": None, "width": None, "height": None}
+            fps = capture.get(cv2.CAP_PROP_FPS)
+            frames = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+            return {
+                # has_audio stays unknown, so combined analysis probes again with ffprobe
+                "has_audio": None,
+                "duration": frames / fps if fps > 0 and frames > 0 else None,
+                "width": int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or None,
+                "height": int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None,
+            }
+        finally:
+            capture.release()
+
+    def lane(self, info: dict, media_type: str):
+        duration = info.get("duration")
+        if duration is None or duration > settings.FAST_LANE_MAX_SECONDS:
+            return SLOW
+        if media_type != "audio":
+            if not info.get("width") or not info.get("height"):
+                return SLOW
+            if info["width"] * info["height"] > settings.FAST_LANE_MAX_PIXELS:
+                return SLOW
+        return FAST
+
+    def cost(self, info: dict, media_type: str):
+        """Rough relative cost: media seconds, times megapixels for video."""
+        duration = info.get("duration")
+        if duration is None:
+            duration = settings.FAST_LANE_MAX_SECONDS  # Unknown: as long as the slow lane's shortest
+        if media_type == "audio" or not info.get("width") or not info.get("height"):
+            return duration
+        return duration * max(1.0, info["width"] * info["height"] / 1e6)
+
+    def submit(self, info: dict, media_type: str, fn, *args):
+        """Queues fn(*args) on the lane info belongs to; raises the pool's errors."""
+        lane = self.lane(info, media_type)
+        # Earliest deadline first: arrival time pushed back by the estimated cost
+        priority = time.monotonic() + self.cost(info, media_type) * settings.ADMISSION_COST_WEIGHT
+        future = self.pools[lane].submit_with_priority(priority, _run_in_lane, lane, fn, *args)
+        with self._lock:
+            self._admitted[lane] += 1
+        tracing.annotate(lane=lane, duration=info.get("duration"))
+        return future
+
+    def admitted(self):
+        with self._lock:
+            return {(lane,): count for lane, count in self._admitted.items()}
@@ -1,76 +1,294 @@
-import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import time
+import numpy as np
 from app.config import settings
 from app.models.video_model import video_model
 from app.models.audio_model import audio_model
-from app.utils import video_utils, audio_utils
+from app.services.admission import scheduler_priority
+from app.services.early_exit import score_until_settled
+from app.services.inference_scheduler import InferenceScheduler
+from app.services.inference_server import inference_client
+from app.services import tracing
+from app.services.metrics import ANALYSIS_SECONDS
+from app.utils import video_utils, audio_utils, media_utils, face_utils, frame_dedup
+
+class AnalysisCancelled(Exception):
+    """Raised from a progress callback to abandon an analysis that nobody is waiting for."""
 
 class DetectionService:
     def __init__(self):
         self.temp_dir = settings.TEMP_DIR
         self.temp_dir.mkdir(exist_ok=True)
+        self.video_scheduler = InferenceScheduler(
+            video_model.score,
+            batch_size=settings.VIDEO_BATCH_SIZE,
+            max_wait_ms=settings.VIDEO_BATCH_MAX_WAIT_MS,
+            name="video"
+        )
+        # Audio branch of combined analysis runs here while the caller scores frames
+        self.audio_executor = ThreadPoolExecutor(
+            max_workers=settings.DETECTION_WORKERS,
+            thread_name_prefix="audio"
+        )
+
+    def score_frames(self, frames):
+        """Per-frame fake probabilities, batched with other in-flight requests when enabled."""
+        if len(frames) == 0:
+            raise ValueError("No frames extracted from video")
+
+        batch = video_model.preprocess(frames)
+        if inference_client.enabled:
+            # Under app.serve the inference process batches across all workers instead
+            return inference_client.score("video", batch, priority=scheduler_priority())
+        if settings.VIDEO_BATCHING:
+            # The model call itself runs on the scheduler thread, shared between requests;
+            # fast-lane frames go into the next batch ahead of slow-lane ones
+            with tracing.span("video_scheduler", frames=len(batch)):
+                return self.video_scheduler.score(batch, priority=scheduler_priority())
+        return video_model.score(batch)
+
+    def sample_frames(self, video_path: Path):
+        """Model input for a video: face crops when FACE_CROP is on, whole frames otherwise."""
+        if settings.FACE_CROP:
+            crops, _ = face_utils.extract_face_crops(video_path)
+            if len(crops) > 0:
+                return crops
+            print("No faces found, falling back to whole frames")
+        return video_utils.extract_frames(video_path)
+
+    def score_video(self, frames, early_exit: bool = False, progress=None):
+        """
+        Mean fake probability over the sampled frames, the number of frames
+        actually scored, and the dedup ratio (share of those frames whose
+        score was reused from a near-duplicate; None when FRAME_DEDUP is off).
+        With early_exit, scoring stops once the verdict against
+        VIDEO_THRESHOLD is statistically settled.
+        progress(stage, fraction, scores), if given, receives each chunk's
+        scores and the share of the frames scored so far.
+        """
+        if len(frames) == 0:
+            raise ValueError("No frames extracted from video")
+
+        items, score_fn, model_scored = frames, self.score_frames, None
+        if settings.FRAME_DEDUP:
+            # Only one frame per cluster of near-duplicates goes through the models; every
+            # frame still gets a score, so the mean stays weighted by cluster size
+            labels, representatives = frame_dedup.cluster(frames, settings.FRAME_DEDUP_MAX_DISTANCE, settings.FRAME_DEDUP_MAX_PIXEL_DIFF)
+            cluster_scores = np.full(len(representatives), np.nan)
+            tracing.annotate(frames_unique=len(representatives))
+
+            def score_fn(indices):
+                clusters = labels[indices]
+                missing = np.unique(clusters[np.isnan(cluster_scores[clusters])])
+                if len(missing) > 0:
+                    cluster_scores[missing] = self.score_frames(frames[representatives[missing]])
+                return cluster_scores[clusters]
+
+            def model_scored():
+                return int(np.count_nonzero(~np.isnan(cluster_scores)))
+
+            # Scored by index so each chunk can look up its clusters
+            items = np.arange(len(frames))
+
+        if progress is not None:
+            scored = 0
+            frame_score_fn = score_fn
+
+            def score_fn(chunk):
+                nonlocal scored
+                scores = frame_score_fn(chunk)
+                scored += len(chunk)
+                progress("scoring", scored / len(frames), scores)
+                return scores
+
+        if not early_exit:
+            if progress is None:
+                scores = score_fn(items)
+            else:
+                # Chunked so progress moves while a long video is scored
+                chunk = settings.VIDEO_BATCH_SIZE
+                scores = np.concatenate([score_fn(items[i:i + chunk]) for i in range(0, len(items), chunk)])
+            mean, used = scores.mean(), len(frames)
+        else:
+            mean, used = score_until_settled(
+                items,
+                score_fn,
+                threshold=settings.VIDEO_THRESHOLD,
+                chunk_size=settings.EARLY_EXIT_CHUNK_SIZE,
+                z=settings.EARLY_EXIT_Z,
+                min_frames=settings.EARLY_EXIT_MIN_FRAMES
+            )
+
+        dedup_ratio = None if model_scored is None else 1.0 - model_scored() / used
+        return mean, used, dedup_ratio
+
+    def analyze(self, media_path: Path, media_type: str, early_exit: bool = None, progress=None, info: dict = None):
+        """
+        Runs the pipeline for media_type ("video", "audio" or "combined")
+        and returns a DetectionResult-shaped dict with the final verdict.
+        progress(stage, fraction, scores=None) is called as the pipeline advances
+        (see score_video and predict_audio); it may raise AnalysisCancelled.
+        info is the upload's probe from admission, if it was already taken.
+        """
+        if early_exit is None:
+            early_exit = settings.EARLY_EXIT
+
+        started = time.perf_counter()
+
+        # Dispatch to correct pipeline
+        with tracing.span("analyze", media_type=media_type, early_exit=early_exit):
+            if media_type == "video":
+                results = self.process_video(media_path, early_exit=early_exit, progress=progress)
+            elif media_type == "combined":
+                results = self.process_media(media_path, early_exit=early_exit, progress=progress, info=info)
+            else:
+                results = self.process_audio(media_path, progress=progress)
+            tracing.annotate(
+                frames_analyzed=results.get("frames_analyzed"),
+                frames_total=results.get("frames_total"),
+                dedup_ratio=results.get("dedup_ratio")
+            )
+
+        ANALYSIS_SECONDS.observe(time.perf_counter() - started, media_type)
+
+        video_confidence = results.get("video_confidence")
+        audio_confidence = results.get("audio_confidence")
+
+        # Final fake detection verdict
+        is_fake = (
+            (video_confidence is not None and video_confidence > settings.VIDEO_THRESHOLD)
+            or
+            (audio_confidence is not None and audio_confidence > settings.AUDIO_THRESHOLD)
+        )
 
-    def process_video(self, video_path: Path):
+        return {
+            "video_confidence": None if video_confidence is None else float(video_confidence),
+            "audio_confidence": None if audio_confidence is None else float(audio_confidence),
+            "is_fake": bool(is_fake),
+            "frames_analyzed": results.get("frames_analyzed"),
+            "frames_total": results.get("frames_total"),
+            "dedup_ratio": results.get("dedup_ratio")
+        }
+
+    def process_video(self, video_path: Path, early_exit: bool = False, progress=None):
         results = {"video_confidence": None}
 
         try:
-            frames = video_utils.extract_frames(video_path)
-            results["video_confidence"] = video_model.predict(frames)
+            if progress is not None:
+                progress("decoding", 0.0)
+            frames = self.sample_frames(video_path)
+            results["video_confidence"], results["frames_analyzed"], results["dedup_ratio"] = self.score_video(frames, early_exit, progress)
+            results["frames_total"] = len(frames)
+        except AnalysisCancelled:
+            raise
         except Exception as e:
             raise RuntimeError(f"Video processing failed: {str(e)}")
 
         return results
 
-    def process_audio(self, media_path: Path):
+    def predict_audio(self, samples, progress=None):
+        """
+        Track-level audio score. With progress, windows are scored a few at a
+        time and progress("audio", fraction, scores) sees each chunk.
+        """
+        if progress is None:
+            return audio_model.predict(samples)
+
+        progress("audio", 0.0)
+        total = len(audio_model.window_starts(len(samples)))
+        scores = []
+        for chunk in audio_model.iter_window_scores(samples, chunk_size=settings.AUDIO_PROGRESS_CHUNK):
+            scores.append(chunk)
+            progress("audio", sum(len(c) for c in scores) / total, chunk)
+        return audio_model.aggregate(np.concatenate(scores))
+
+    def process_audio(self, media_path: Path, progress=None):
         results = {"audio_confidence": None}
-        audio_path = self.temp_dir / "audio.wav"
 
         try:
-            audio_utils.extract_audio(media_path, audio_path)
-            if audio_path.exists():
-                results["audio_confidence"] = audio_model.predict(audio_path)
-                audio_path.unlink()  # Clean up after prediction
+            # Conformant 16 kHz mono int16 WAVs skip the ffmpeg transcode entirely
+            samples = audio_utils.read_pcm16_wav(media_path)
+            if samples is None:
+                # PCM stays in memory: no shared temp file, no second decode
+                samples = audio_utils.extract_audio(media_path)
+            if len(samples) > 0:
+                results["audio_confidence"] = self.predict_audio(samples, progress)
             else:
-                print("Audio file not created")
+                print("No audio samples extracted")
+        except AnalysisCancelled:
+            raise
         except Exception as e:
             print(f"Audio processing failed: {e}")
             results["audio_confidence"] = None
 
         return results
 
-    def process_upload(self, video_path: Path):
+    def process_media(self, media_path: Path, early_exit: bool = False, progress=None, info: dict = None):
         """
-        Deprecated in new main.py but kept for compatibility.
-        Processes both video and audio in parallel.
+        Combined audio + video analysis from a single demux.
+        The audio model runs alongside the video model, so the request takes
+        as long as the slower branch rather than the sum of both.
         """
         results = {"video_confidence": None, "audio_confidence": None}
 
-        def video_task():
-            try:
-                frames = video_utils.extract_frames(video_path)
-                results["video_confidence"] = video_model.predict(frames)
-            except Exception as e:
-                raise RuntimeError(f"Video processing failed: {str(e)}")
-
-        def audio_task():
-            try:
-                audio_path = self.temp_dir / "audio.wav"
-                audio_utils.extract_audio(video_path, audio_path)
-                if audio_path.exists():
-                    results["audio_confidence"] = audio_model.predict(audio_path)
-                    audio_path.unlink()
-                else:
-                    print("Audio file not created")
-            except Exception as e:
-                print(f"Audio processing failed: {e}")
-                results["audio_confidence"] = None
+        audio_future = None
 
-        v_thread = threading.Thread(target=video_task)
-        a_thread = threading.Thread(target=audio_task)
+        try:
+            if progress is not None:
+                progress("decoding", 0.0)
+            if info is None or info.get("has_audio") is None:
+                info = media_utils.probe(media_path)
+            if settings.FACE_CROP:
+                # Face crops need full-resolution frames, which the shared demux
+                # does not produce; decode the audio track alongside instead
+                if info["has_audio"]:
+                    audio_future = self._submit_audio(self._predict_audio_track, media_path, progress)
+                frames = self.sample_frames(media_path)
+            else:
+                frames, samples = media_utils.demux(media_path, with_audio=info["has_audio"])
+                if len(samples) > 0:
+                    audio_future = self._submit_audio(self.predict_audio, samples, progress)
+                else:
+                    print("No audio samples extracted")
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Media demux failed: {str(e)}")
 
-        v_thread.start()
-        a_thread.start()
-        v_thread.join()
-        a_thread.join()
+        try:
+            results["video_confidence"], results["frames_analyzed"], results["dedup_ratio"] = self.score_video(frames, early_exit, progress)
+            results["frames_total"] = len(frames)
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Video processing failed: {str(e)}")
+        finally:
+            if audio_future is not None:
+                try:
+                    results["audio_confidence"] = audio_future.result()
+                except AnalysisCancelled:
+                    pass
+                except Exception as e:
+                    print(f"Audio processing failed: {e}")
 
         return results
+
+    def _submit_audio(self, fn, *args):
+        # Carry the request context (tracing) over to the audio thread
+        return self.audio_executor.submit(contextvars.copy_context().run, fn, *args)
+
+    def _predict_audio_track(self, media_path: Path, progress=None):
+        samples = audio_utils.extract_audio(media_path)
+        if len(samples) == 0:
+            print("No audio samples extracted")
+            return None
+        return self.predict_audio(samples, progress)
+
+    def process_upload(self, video_path: Path):
+        """
+        Deprecated in new main.py but kept for compatibility.
+        Processes both video and audio in parallel.
+        """
+        return self.process_media(video_path)
@@ -0,0 +1,62 @@
+import math
+import numpy as np
+
+GOLDEN_RATIO_CONJUGATE = 0.6180339887498949
+
+def spread_order(n: int):
+    """
+    Visiting order that covers the whole video early on (golden-ratio
+    low-discrepancy sequence), so any prefix is a fair sample of all frames.
+    """
+    return np.argsort((np.arange(n) * GOLDEN_RATIO_CONJUGATE) % 1.0, kind="stable")
+
+def floored_variance(scores: np.ndarray, z: float):
+    """
+    Sample variance of scores in [0, 1] with z^2 / 2 pseudo-scores added at
+    each of 0 and 1, as in the Agresti-Coull / Wilson interval for a
+    proportion. Never zero, and dominated by the real scores as they grow.
+    """
+    pseudo = z * z / 2
+    total = len(scores) + 2 * pseudo
+    center = (scores.sum() + pseudo) / total
+    squares = ((scores - center) ** 2).sum() + pseudo * (center ** 2 + (1 - center) ** 2)
+    return squares / (total - 1)
+
+def score_until_settled(frames, score_fn, threshold: float, chunk_size: int = 16, z: float = 2.58, min_frames: int = 16):
+    """
+    Scores frames chunk by chunk and stops as soon as the confidence interval
+    of the running mean lies entirely on one side of threshold.
+
+    The frames are a finite population, so the standard error carries the
+    finite population correction and shrinks to zero once every frame is
+    scored: the result then equals the plain mean.
+
+    The variance is floored (see floored_variance) so a run of identical
+    scores, e.g. near-duplicate frames sharing one score, is not mistaken
+    for certainty.
+
+    Returns (mean_score, frames_used).
+    """
+    n = len(frames)
+    if n == 0:
+        raise ValueError("No frames to score")
+
+    order = spread_order(n)
+    scores = np.empty(n, dtype=np.float64)
+    used = 0
+
+    while used < n:
+        indices = order[used:used + chunk_size]
+        scores[used:used + len(indices)] = score_fn(frames[indices])
+        used += len(indices)
+
+        if used < max(min_frames, 2) or used == n:
+            continue
+
+        seen = scores[:used]
+        mean = seen.mean()
+        standard_error = math.sqrt(floored_variance(seen, z) / used) * math.sqrt((n - used) / (n - 1))
+        if abs(mean - threshold) > z * standard_error:
+            break
+
+    return scores[:used].mean(), used
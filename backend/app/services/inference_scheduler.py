@@ -0,0 +1,153 @@
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from app.services.metrics import STAGE_SECONDS
+
+class _PendingRequest:
+    def __init__(self, total: int):
+        self.future = Future()
+        self.scores = None
+        self.remaining = total
+        self.lock = threading.Lock()
+
+    def fill(self, offset: int, scores: np.ndarray):
+        with self.lock:
+            if self.future.done():
+                return
+            if self.scores is None:
+                self.scores = np.empty((self.remaining,) + scores.shape[1:], dtype=scores.dtype)
+            self.scores[offset:offset + len(scores)] = scores
+            self.remaining -= len(scores)
+            if self.remaining == 0:
+                self.future.set_result(self.scores)
+
+    def fail(self, error: Exception):
+        with self.lock:
+            if not self.future.done():
+                self.future.set_exception(error)
+
+class _Chunk:
+    def __init__(self, request: _PendingRequest, offset: int, items: np.ndarray, enqueued_at: float, priority: int = 0):
+        self.request = request
+        self.offset = offset
+        self.items = items
+        self.enqueued_at = enqueued_at
+        self.priority = priority
+
+    def split(self, size: int):
+        head = _Chunk(self.request, self.offset, self.items[:size], self.enqueued_at, self.priority)
+        tail = _Chunk(self.request, self.offset + size, self.items[size:], self.enqueued_at, self.priority)
+        return head, tail
+
+class InferenceScheduler:
+    """
+    Collects items submitted by concurrent requests into fixed-size batches
+    for score_fn, which must return one score row per input row.
+    A batch is dispatched once it is full or once its oldest item has waited
+    max_wait_ms; each caller gets back exactly its own slice of the scores.
+    Submissions larger than a batch are scored a batch at a time, taking
+    turns with the other waiting requests. Batches are filled from the
+    lowest priority value first (the admission lanes), FIFO within one.
+    """
+
+    def __init__(self, score_fn, batch_size: int = 32, max_wait_ms: float = 10.0, name: str = "inference"):
+        self.score_fn = score_fn
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()  # FIFO among equal priorities; chunks don't compare
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def submit(self, items: np.ndarray, priority: int = 0) -> Future:
+        request = _PendingRequest(len(items))
+        if len(items) == 0:
+            request.future.set_result(np.empty((0,), dtype=np.float32))
+            return request.future
+
+        self._ensure_started()
+        self._put(_Chunk(request, 0, items, time.monotonic(), priority))
+        return request.future
+
+    def score(self, items: np.ndarray, priority: int = 0) -> np.ndarray:
+        return self.submit(items, priority).result()
+
+    def _put(self, chunk: _Chunk):
+        self._queue.put((chunk.priority, next(self._sequence), chunk))
+
+    def _get(self, timeout: float = None):
+        if timeout is None:
+            return self._queue.get()[2]
+        return (self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())[2]
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-scheduler", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            chunk = self._get()
+            if len(chunk.items) > self.batch_size:
+                chunk = self._requeue_tail(chunk, self.batch_size)
+
+            batch = [chunk]
+            size = len(chunk.items)
+            deadline = chunk.enqueued_at + self.max_wait
+
+            while size < self.batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    chunk = self._get(timeout)
+                except queue.Empty:
+                    break
+
+                free = self.batch_size - size
+                if len(chunk.items) > free:
+                    chunk = self._requeue_tail(chunk, free)
+                batch.append(chunk)
+                size += len(chunk.items)
+
+            self._dispatch(batch)
+
+    def _requeue_tail(self, chunk: _Chunk, size: int):
+        # The rest of a large submission goes behind the chunks already waiting, so requests
+        # take turns batch by batch instead of the first big one holding the model until done
+        head, tail = chunk.split(size)
+        self._put(tail)
+        return head
+
+    def _dispatch(self, batch):
+        dispatched_at = time.monotonic()
+        for chunk in batch:
+            STAGE_SECONDS.observe(dispatched_at - chunk.enqueued_at, f"{self.name}_batch_wait")
+
+        try:
+            if len(batch) == 1:
+                items = batch[0].items
+            else:
+                items = np.concatenate([chunk.items for chunk in batch])
+            scores = np.asarray(self.score_fn(items))
+        except Exception as e:
+            for chunk in batch:
+                chunk.request.fail(e)
+            return
+
+        start = 0
+        for chunk in batch:
+            end = start + len(chunk.items)
+            chunk.request.fill(chunk.offset, scores[start:end])
+            start = end
@@ -0,0 +1,179 @@
+import mmap
+import os
+import threading
+import traceback
+import uuid
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+import numpy as np
+
+from app.config import settings
+from app.services.metrics import stage
+
+class InferenceClient:
+    """
+    Scores batches on the inference process (see app.serve) instead of with
+    local models. Each thread has its own connection and its own buffer, a
+    memory-mapped file next to the server socket (tmpfs under /dev/shm): the
+    batch is written there once and only the file name, shape and dtype go
+    over the socket. Scores come back pickled; they are small.
+    """
+
+    def __init__(self, address: str, authkey: str):
+        self.address = address
+        self.authkey = authkey.encode()
+        self._local = threading.local()
+        self._info = None
+
+    @property
+    def enabled(self):
+        return bool(self.address)
+
+    def status(self):
+        return self._call(("status",))
+
+    def info(self):
+        """The server's status once its models are ready; what it reports then does not change."""
+        if self._info is None:
+            status = self.status()
+            if not status["ready"]:
+                raise RuntimeError("Models are not ready on the inference server")
+            self._info = status
+        return self._info
+
+    def score(self, model: str, batch: np.ndarray, priority: int = 0):
+        """priority orders video batches on the server's scheduler (see admission.LANE_PRIORITY)."""
+        batch = np.ascontiguousarray(batch)
+        path, buffer = self._buffer(batch.nbytes)
+        np.ndarray(batch.shape, batch.dtype, buffer=buffer)[...] = batch
+        with stage(f"{model}_remote"):
+            return self._call(("score", model, path, batch.shape, batch.dtype.str, priority))
+
+    def _buffer(self, nbytes: int):
+        current = getattr(self._local, "buffer", None)
+        if current is not None and len(current[1]) >= nbytes:
+            return current
+
+        if current is not None:
+            current[1].close()
+            os.unlink(current[0])
+        path = str(Path(self.address).parent / f"batch-{os.getpid()}-{uuid.uuid4().hex}")
+        with open(path, "w+b") as f:
+            f.truncate(max(nbytes, 1))
+            buffer = mmap.mmap(f.fileno(), max(nbytes, 1))
+        self._local.buffer = (path, buffer)
+        return self._local.buffer
+
+    def _call(self, request):
+        conn = getattr(self._local, "conn", None)
+        try:
+            if conn is None:
+                conn = self._local.conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            conn.send(request)
+            ok, value = conn.recv()
+        except (OSError, EOFError):
+            self._local.conn = None  # Reconnect on the next call
+            raise
+        if not ok:
+            raise RuntimeError(f"Inference server: {value}")
+        return value
+
+class InferenceServer:
+    """
+    The process that owns the only copy of the model weights under app.serve.
+    Each API worker connection gets a thread; video batches from all of them
+    go through one InferenceScheduler, so frames from different workers share
+    model calls.
+    """
+
+    def __init__(self, address: str, authkey: str):
+        # Imported here: workers import this module for the client and must not load models
+        from app.models.audio_model import audio_model
+        from app.models.video_model import video_model
+        from app.services.inference_scheduler import InferenceScheduler
+        from app.services.model_manager import model_manager
+
+        self.address = address
+        self.authkey = authkey.encode()
+        self.audio_model = audio_model
+        self.video_model = video_model
+        self.model_manager = model_manager
+        self.video_scheduler = InferenceScheduler(
+            video_model.score,
+            batch_size=settings.VIDEO_BATCH_SIZE,
+            max_wait_ms=settings.VIDEO_BATCH_MAX_WAIT_MS,
+            name="video"
+        )
+
+    def serve_forever(self):
+        self.model_manager.start(background=True)
+        with Listener(self.address, family="AF_UNIX", authkey=self.authkey) as listener:
+            print(f"Inference server listening on {self.address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    print(f"Rejected inference connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), name="inference-conn", daemon=True).start()
+
+    def _handle(self, conn):
+        mapped = None  # (path, mmap) of the client's current buffer
+        try:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                try:
+                    if request[0] == "status":
+                        value = self._status()
+                    else:
+                        _, model, path, shape, dtype, priority = request
+                        if mapped is None or mapped[0] != path:
+                            if mapped is not None:
+                                mapped[1].close()
+                            mapped = (path, self._map(path))
+                        # Copied out, so no array outlives the mapping once the client swaps buffers
+                        batch = np.array(np.ndarray(shape, np.dtype(dtype), buffer=mapped[1]))
+                        value = self._score(model, batch, priority)
+                    conn.send((True, value))
+                except Exception as e:
+                    traceback.print_exc()
+                    conn.send((False, f"{type(e).__name__}: {e}"))
+        finally:
+            conn.close()
+            if mapped is not None:
+                mapped[1].close()
+
+    def _map(self, path: str):
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _status(self):
+        status = self.model_manager.status()
+        status["finished"] = self.model_manager.finished_at is not None
+        if self.model_manager.ready:
+            status["model_version"] = self.model_manager.model_version
+            status["audio_takes_pcm"] = self.audio_model.takes_pcm
+        return status
+
+    def _score(self, model: str, batch: np.ndarray, priority: int = 0):
+        if not self.model_manager.ready:
+            raise RuntimeError("Models are not ready")
+        if model == "video":
+            if settings.VIDEO_BATCHING:
+                return self.video_scheduler.score(batch, priority)
+            return self.video_model.score(batch)
+        if model == "audio":
+            return self.audio_model._score(batch)
+        raise ValueError(f"Unknown model: {model}")
+
+def run(address: str, authkey: str):
+    """Entry point of the inference process started by app.serve."""
+    InferenceServer(address, authkey).serve_forever()
+
+# Enabled in API workers started by app.serve, which sets INFERENCE_SERVER
+inference_client = InferenceClient(settings.INFERENCE_SERVER, settings.INFERENCE_AUTHKEY)
@@ -0,0 +1,74 @@
+import queue
+import threading
+import traceback
+from app.services.job_store import JobStore
+
+class JobRunner:
+    """
+    Background threads that work through the job store. Jobs are queued by
+    id only, all state lives in the store: on start() every job left queued
+    or running by a previous process is picked up again. Jobs are claimed
+    in the store before they run, so several processes can share one store.
+
+    process_fn(job, progress) returns the result dict; progress(stage, fraction, scores=None)
+    may be called from it to report how far the job has got.
+    """
+
+    def __init__(self, store: JobStore, process_fn, workers: int = 1, name: str = "job"):
+        self.store = store
+        self.process_fn = process_fn
+        self.workers = workers
+        self.name = name
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def start(self, recover: bool = True):
+        """
+        recover requeues jobs left running; only safe when no other process
+        is working through the same store.
+        """
+        with self._lock:
+            if self._threads:
+                return
+            if recover:
+                self.store.requeue_interrupted()
+            for job_id in self.store.queued():
+                self._queue.put(job_id)
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, job_id: str):
+        self._queue.put(job_id)
+
+    def shutdown(self, wait: bool = True):
+        # Queued jobs stay queued in the store and resume on the next start()
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+
+            job = self.store.get(job_id)
+            if job is None or not self.store.claim(job_id):
+                continue
+            try:
+                result = self.process_fn(job, lambda stage, fraction, scores=None: self.store.set_progress(job_id, stage, fraction))
+            except Exception as e:
+                print(f"Job {job_id} failed: {e}")
+                traceback.print_exc()
+                self.store.fail(job_id, str(e))
+            else:
+                self.store.complete(job_id, result)
@@ -0,0 +1,123 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    media_type TEXT NOT NULL,
+    early_exit INTEGER NOT NULL,
+    filename TEXT,
+    media_path TEXT NOT NULL,
+    digest TEXT,
+    stage TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+class JobStore:
+    """
+    Detection jobs persisted in a local SQLite file, so queued work survives
+    a restart and finished results can be fetched any number of times.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # One connection shared by the API and job worker threads
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+
+    def create(self, media_path: Path, media_type: str, early_exit: bool, filename: str = None, digest: str = None, job_id: str = None):
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, media_type, early_exit, filename, media_path, digest, stage, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, media_type, int(early_exit), filename, str(media_path), digest, QUEUED, now, now)
+            )
+        return job_id
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._as_dict(row) if row else None
+
+    def queued(self):
+        """Ids of queued jobs, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def claim(self, job_id: str):
+        """
+        Marks a queued job running; False if it is not queued (another
+        process sharing this store got to it first).
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, progress = 0.0, updated_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, RUNNING, time.time(), job_id, QUEUED)
+            )
+        return cursor.rowcount == 1
+
+    def requeue_interrupted(self):
+        """Puts jobs left running by a process that died back in the queue."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, updated_at = ? WHERE status = ?", (QUEUED, QUEUED, time.time(), RUNNING)
+            )
+
+    def set_progress(self, job_id: str, stage: str, progress: float):
+        self._update(job_id, stage=stage, progress=progress)
+
+    def complete(self, job_id: str, result: dict):
+        self._update(job_id, status=DONE, stage=DONE, progress=1.0, result=json.dumps(result), error=None)
+
+    def fail(self, job_id: str, error: str):
+        self._update(job_id, status=FAILED, stage=FAILED, error=error)
+
+    def delete_finished(self, older_than_seconds: float):
+        """Drops done/failed jobs last updated before the cutoff; returns their media paths."""
+        cutoff = time.time() - older_than_seconds
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT media_path FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, cutoff)
+            ).fetchall()
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, cutoff)
+            )
+        return [Path(row["media_path"]) for row in rows]
+
+    def _update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def _as_dict(self, row):
+        job = dict(row)
+        job["early_exit"] = bool(job["early_exit"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
@@ -0,0 +1,201 @@
+import hashlib
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from app.config import settings
+from app.models.video_model import video_model
+from app.models.audio_model import audio_model
+from app.services.inference_server import inference_client
+
+PENDING = "pending"
+LOADING = "loading"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+# Settings that change the scores or verdict (media type and early exit are part of the cache key itself)
+SCORING_SETTINGS = (
+    "INFERENCE_BACKEND",
+    "FRAME_INTERVAL", "FRAME_BACKEND", "INPUT_SHAPE",
+    "FACE_CROP", "FACE_DETECTOR", "FACE_DETECT_EVERY", "FACE_DETECT_WIDTH", "FACE_TRACK_MIN_SCORE",
+    "FRAME_DEDUP", "FRAME_DEDUP_MAX_DISTANCE", "FRAME_DEDUP_MAX_PIXEL_DIFF",
+    "EARLY_EXIT_CHUNK_SIZE", "EARLY_EXIT_MIN_FRAMES", "EARLY_EXIT_Z",
+    "AUDIO_SAMPLE_RATE", "N_MFCC", "AUDIO_FRONTEND",
+    "AUDIO_WINDOW_STRIDE", "AUDIO_MAX_WINDOWS", "AUDIO_WINDOW_AGGREGATE",
+    "VIDEO_THRESHOLD", "AUDIO_THRESHOLD",
+)
+
+class _ModelEntry:
+    def __init__(self, name: str, loader):
+        self.name = name
+        self.loader = loader
+        self.state = PENDING
+        self.error = None
+        self.resolve_seconds = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+
+    def as_dict(self):
+        return {
+            "state": self.state,
+            "resolve_seconds": self.resolve_seconds,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,
+        }
+
+class ModelManager:
+    """
+    Resolves, loads and warms every model concurrently, optionally in the
+    background, and keeps per-model state and timings for /api/ready.
+    In an app.serve worker it loads nothing and mirrors the inference
+    process instead.
+    """
+
+    def __init__(self):
+        self.entries = {
+            "faceforensics": _ModelEntry("faceforensics", video_model.load_faceforensics),
+            "celebdf": _ModelEntry("celebdf", video_model.load_celebdf),
+            "audio": _ModelEntry("audio", audio_model.load),
+        }
+        # Warm-up runs once every model of the group is loaded
+        self.groups = {
+            "video": (["faceforensics", "celebdf"], video_model.warm_up),
+            "audio": (["audio"], audio_model.warm_up),
+        }
+        self._ready = threading.Event()
+        self._thread = None
+        self.started_at = None
+        self.finished_at = None
+        self._model_version = None
+        self._remote_status = None
+
+    @property
+    def model_version(self):
+        """
+        Identifies what produced a result, e.g. for cache keys: the loaded
+        weights (MODEL_VERSION, else the resolved model files; HF snapshot
+        paths embed the revision) plus every setting that changes the scores.
+        """
+        if self._model_version is None:
+            digest = hashlib.sha256()
+            if settings.MODEL_VERSION:
+                digest.update(settings.MODEL_VERSION.encode())
+            else:
+                for name in sorted(self.entries):
+                    path = settings.serving_model_path(name)
+                    digest.update(f"{name}:{path}:{path.stat().st_size}".encode())
+            for name in SCORING_SETTINGS:
+                digest.update(f"{name}={getattr(settings, name)!r}".encode())
+            self._model_version = digest.hexdigest()[:16]
+        return self._model_version
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def start(self, background: bool = True):
+        if self._thread is not None or self.started_at is not None:
+            return
+        target = self.attach_remote if inference_client.enabled else self.load_all
+        if background:
+            self._thread = threading.Thread(target=target, name="model-loader", daemon=True)
+            self._thread.start()
+        else:
+            target()
+
+    def wait_until_ready(self, timeout: float = None):
+        return self._ready.wait(timeout)
+
+    def load_all(self):
+        self.started_at = time.time()
+        workers = len(self.entries) + len(self.groups)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="model-load") as executor:
+            loads = {name: executor.submit(self._load_entry, entry) for name, entry in self.entries.items()}
+            warmups = [
+                executor.submit(self._warm_group, [loads[name] for name in names], [self.entries[name] for name in names], warm_up)
+                for names, warm_up in self.groups.values()
+            ]
+            wait(warmups)
+
+        self.finished_at = time.time()
+        if all(entry.state == READY for entry in self.entries.values()):
+            self._ready.set()
+            print(f"✅ Models ready in {self.finished_at - self.started_at:.1f}s")
+        else:
+            print("❌ Model loading failed:", {name: e.error for name, e in self.entries.items() if e.error})
+
+    def attach_remote(self, poll_seconds: float = 0.5):
+        """Waits for the inference process to finish loading and takes over its state."""
+        self.started_at = time.time()
+        while True:
+            try:
+                self._remote_status = inference_client.status()
+            except OSError:
+                pass  # Not listening yet
+            if self._remote_status is not None and self._remote_status["finished"]:
+                break
+            time.sleep(poll_seconds)
+
+        self.finished_at = time.time()
+        if self._remote_status["ready"]:
+            # The server's version, so every worker keys the result cache the same way
+            self._model_version = self._remote_status["model_version"]
+            self._ready.set()
+            print(f"✅ Inference server ready after {self.finished_at - self.started_at:.1f}s")
+        else:
+            print("❌ Model loading failed in the inference server")
+
+    def status(self):
+        status = {
+            "ready": self.ready,
+            "elapsed_seconds": None if self.started_at is None else round((self.finished_at or time.time()) - self.started_at, 3),
+            "models": {name: entry.as_dict() for name, entry in self.entries.items()},
+        }
+        if inference_client.enabled:
+            status["models"] = (self._remote_status or {}).get("models", {})
+            status["inference_server"] = settings.INFERENCE_SERVER
+        return status
+
+    def _load_entry(self, entry: _ModelEntry):
+        entry.state = LOADING
+        try:
+            start = time.perf_counter()
+            settings.serving_model_path(entry.name)
+            entry.resolve_seconds = round(time.perf_counter() - start, 3)
+
+            start = time.perf_counter()
+            entry.loader()
+            entry.load_seconds = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            traceback.print_exc()
+            entry.state = FAILED
+            entry.error = str(e)
+            raise
+
+    def _warm_group(self, loads, entries, warm_up):
+        wait(loads)
+        if any(entry.state == FAILED for entry in entries):
+            return
+
+        for entry in entries:
+            entry.state = WARMING
+        try:
+            start = time.perf_counter()
+            warm_up()
+            elapsed = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            traceback.print_exc()
+            for entry in entries:
+                entry.state = FAILED
+                entry.error = f"Warm-up failed: {e}"
+            return
+
+        for entry in entries:
+            entry.warmup_seconds = elapsed
+            entry.state = READY
+
+model_manager = ModelManager()
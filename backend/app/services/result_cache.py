@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+
+class ResultCache:
+    """
+    LRU + TTL cache of detection results keyed by upload content digest.
+    Entries live in process memory, and optionally also as JSON files in
+    cache_dir so they survive restarts and are shared between workers.
+    Concurrent misses for the same key coalesce onto one computation via
+    claim()/resolve()/fail().
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400, cache_dir: Path = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: str, model_version: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires_at"] > now and entry["model_version"] == model_version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["result"]
+            if entry is not None:
+                del self._entries[key]
+
+        entry = self._read_disk(key)
+        if entry is not None and entry["expires_at"] > now and entry["model_version"] == model_version:
+            with self._lock:
+                self._remember(key, entry)
+                self.hits += 1
+            return entry["result"]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, result: dict, model_version: str):
+        entry = {
+            "expires_at": time.time() + self.ttl_seconds,
+            "model_version": model_version,
+            "result": result,
+        }
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def claim(self, key: str):
+        """
+        Returns (future, is_leader). The leader computes the result and must
+        call resolve() or fail(); everyone else waits on the shared future.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            return future, True
+
+    def resolve(self, key: str, result: dict, model_version: str):
+        self.put(key, result, model_version)
+        with self._lock:
+            future = self._in_flight.pop(key, None)
+        if future is not None:
+            future.set_result(result)
+
+    def fail(self, key: str, error: BaseException):
+        with self._lock:
+            future = self._in_flight.pop(key, None)
+        if future is not None:
+            future.set_exception(error)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "in_flight": len(self._in_flight),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk": str(self.cache_dir) if self.cache_dir else None,
+            }
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def _read_disk(self, key):
+        if self.cache_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with path.open("r") as f:
+                entry = json.load(f)
+            os.utime(path)  # Keep disk eviction LRU
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, entry):
+        if self.cache_dir is None:
+            return
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with tmp_path.open("w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+
+            files = sorted(self.cache_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+            for stale in files[:max(0, len(files) - self.max_entries)]:
+                stale.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"Result cache write failed: {e}")
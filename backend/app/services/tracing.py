@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from app.config import settings
+
+# Active trace and innermost open span of the current request. Work handed to
+# other threads keeps them via contextvars.copy_context() (see WorkerPool).
+_trace = ContextVar("trace", default=None)
+_span = ContextVar("span", default=None)
+
+class Trace:
+    """Spans of one request, exported in Chrome trace-event format (chrome://tracing, Perfetto)."""
+
+    def __init__(self, name: str, attrs: dict = None):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attrs = attrs or {}
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self._events = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, end: float, attrs: dict = None):
+        """Records a finished span; start/end are time.perf_counter() readings."""
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": round((start - self._origin) * 1e6, 1),
+            "dur": round((end - start) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": attrs or {},
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def export(self, trace_dir: Path):
+        trace_dir = Path(trace_dir)
+        trace_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            events = sorted(self._events, key=lambda event: event["ts"])
+        path = trace_dir / f"{self.trace_id}.json"
+        path.write_text(json.dumps({
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "metadata": {"trace_id": self.trace_id, "name": self.name, "started_at": self.started_at, **self.attrs},
+        }, default=str))
+        return path
+
+class _Span:
+    def __init__(self, trace: Trace, name: str, attrs: dict):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self._token = _span.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        _span.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = repr(exc)
+        self.trace.add(self.name, self._start, end, self.attrs)
+        return False
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def enabled():
+    """True inside a traced request; guard attributes that are costly to compute with it."""
+    return _trace.get() is not None
+
+def current():
+    return _trace.get()
+
+def span(name: str, **attrs):
+    """
+    Times the enclosed block as a span of the active trace. Without an
+    active trace this returns a shared no-op, so untraced requests pay one
+    context-variable lookup.
+    """
+    trace = _trace.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name, attrs)
+
+def annotate(**attrs):
+    """Adds attributes to the innermost open span, if the request is traced."""
+    current_span = _span.get()
+    if current_span is not None:
+        current_span.attrs.update(attrs)
+
+@contextmanager
+def start_trace(name: str, enabled: bool = None, **attrs):
+    """
+    Traces the enclosed block when enabled (default: the TRACE setting) and
+    writes the trace to TRACE_DIR/<trace_id>.json on exit. Yields the Trace,
+    or None when tracing is off.
+    """
+    if not (settings.TRACE if enabled is None else enabled):
+        yield None
+        return
+
+    trace = Trace(name, attrs)
+    token = _trace.set(trace)
+    try:
+        with span(name, **attrs):
+            yield trace
+    finally:
+        _trace.reset(token)
+        try:
+            trace.export(settings.TRACE_DIR)
+        except OSError as e:
+            print(f"Trace export failed: {e}")
@@ -0,0 +1,106 @@
+import contextvars
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+
+class PoolSaturatedError(Exception):
+    """Raised when the pool's queue is full; the caller should retry later."""
+
+class PoolClosedError(Exception):
+    """Raised when work is submitted to a pool that is shutting down."""
+
+class WorkerPool:
+    """
+    Fixed number of worker threads fed from a bounded priority queue
+    (lowest priority value first, FIFO among equals).
+    submit() never blocks: when every worker is busy and the queue is full
+    it raises PoolSaturatedError so the API can reject the request immediately.
+    """
+
+    def __init__(self, workers: int, queue_size: int, name: str = "worker"):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.name = name
+        self._queue = queue.PriorityQueue(maxsize=queue_size)
+        self._sequence = itertools.count()  # Tie-breaker: work items themselves don't compare
+        self._threads = []
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._closed = False
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        return self.submit_with_priority(0, fn, *args, **kwargs)
+
+    def submit_with_priority(self, priority: float, fn, *args, **kwargs) -> Future:
+        if self._closed:
+            raise PoolClosedError(f"{self.name} pool is shut down")
+
+        self._ensure_started()
+        future = Future()
+        try:
+            # Run in the submitter's context so request-scoped state (tracing) follows the work
+            work = (future, contextvars.copy_context(), fn, args, kwargs)
+            self._queue.put_nowait((priority, next(self._sequence), work))
+        except queue.Full:
+            raise PoolSaturatedError(
+                f"{self.name} pool saturated ({self.workers} running, {self.queue_size} queued)"
+            )
+        return future
+
+    def shutdown(self, wait: bool = True):
+        self._closed = True
+
+        # Cancel work that has not started yet so the sentinels fit in the queue
+        while True:
+            try:
+                _, _, work = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if work is not None:
+                work[0].cancel()
+
+        for _ in self._threads:
+            self._queue.put((float("inf"), next(self._sequence), None))
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            _, _, work = self._queue.get()
+            if work is None:
+                return
+
+            future, context, fn, args, kwargs = work
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            with self._lock:
+                self._in_flight += 1
+            try:
+                future.set_result(context.run(fn, *args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
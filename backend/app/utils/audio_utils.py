@@ -1,10 +1,20 @@
+import struct
 import subprocess
+import numpy as np
 from pathlib import Path
+from app.config import settings
+from app.services import tracing
+from app.services.metrics import stage
+
+def extract_audio(video_path: Path, output_path: Path = None):
+    """
+    Extracts 16 kHz PCM with ffmpeg. Writes a WAV to output_path, or, when
+    output_path is None, streams mono s16le from ffmpeg stdout and returns
+    float32 samples in [-1, 1] without touching the disk.
+    """
+    if output_path is None:
+        return _extract_audio_pcm(video_path)
 
-def extract_audio(video_path: Path, output_path: Path):
-    print(f"🔍 DEBUG - Extracting audio from: {video_path}")
-    print(f"🔍 DEBUG - Output audio path: {output_path}")
-    
     try:
         command = [
             "ffmpeg",
@@ -16,12 +26,9 @@ def extract_audio(video_path: Path, output_path: Path):
             str(output_path)
         ]
         
-        result = subprocess.run(command, capture_output=True, text=True, check=True)
-        print(f"🔍 DEBUG - FFmpeg command succeeded")
-        print(f"🔍 DEBUG - Audio file exists: {output_path.exists()}")
-        
-        if output_path.exists():
-            print(f"🔍 DEBUG - Audio file size: {output_path.stat().st_size} bytes")
+        with stage("ffmpeg_audio"):
+            subprocess.run(command, capture_output=True, text=True, check=True)
+            tracing.annotate(output_path=str(output_path))
         
     except subprocess.CalledProcessError as e:
         print(f"❌ FFmpeg failed: {e}")
@@ -30,3 +37,81 @@ def extract_audio(video_path: Path, output_path: Path):
     except Exception as e:
         print(f"❌ Audio extraction failed: {e}")
         raise
+
+def ffmpeg_pcm_args():
+    """ffmpeg output options that emit mono s16le PCM at AUDIO_SAMPLE_RATE."""
+    return [
+        "-map", "0:a:0",
+        "-vn",
+        "-ac", "1",
+        "-ar", str(settings.AUDIO_SAMPLE_RATE),
+        "-acodec", "pcm_s16le",
+        "-f", "s16le"
+    ]
+
+def pcm_to_float(buffer: bytes):
+    # Same scaling librosa/soundfile apply to 16-bit PCM
+    return np.frombuffer(buffer, dtype="<i2").astype(np.float32) / 32768.0
+
+def _extract_audio_pcm(media_path: Path):
+    command = ["ffmpeg", "-v", "error", "-i", str(media_path)] + ffmpeg_pcm_args() + ["pipe:1"]
+
+    try:
+        with stage("ffmpeg_audio"):
+            result = subprocess.run(command, capture_output=True, check=True)
+            tracing.annotate(pcm_bytes=len(result.stdout))
+    except subprocess.CalledProcessError as e:
+        print(f"❌ FFmpeg failed: {e}")
+        print(f"❌ FFmpeg stderr: {e.stderr.decode(errors='replace')}")
+        raise
+
+    return pcm_to_float(result.stdout)
+
+def read_pcm16_wav(path: Path):
+    """
+    Memory-maps the samples of a WAV that is already 16-bit PCM, mono, at
+    AUDIO_SAMPLE_RATE, without decoding, resampling or copying.
+    Returns an int16 array, or None if the file is not in that exact format.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(12)
+            if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+                return None
+
+            conformant = False
+            while True:
+                chunk = f.read(8)
+                if len(chunk) < 8:
+                    return None
+                chunk_id, chunk_size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+
+                if chunk_id == b"fmt ":
+                    fmt = f.read(chunk_size)
+                    audio_format, channels, sample_rate = struct.unpack("<HHI", fmt[:8])
+                    bits = struct.unpack("<H", fmt[14:16])[0]
+                    if audio_format == 0xFFFE and len(fmt) >= 26:
+                        # WAVE_FORMAT_EXTENSIBLE: the sub-format carries the real codec
+                        audio_format = struct.unpack("<H", fmt[24:26])[0]
+                    conformant = (
+                        audio_format == 1 and channels == 1
+                        and sample_rate == settings.AUDIO_SAMPLE_RATE and bits == 16
+                    )
+                    if chunk_size % 2:
+                        f.seek(1, 1)
+                elif chunk_id == b"data":
+                    if not conformant:
+                        return None
+                    offset = f.tell()
+                    # Streamed WAVs (e.g. ffmpeg to a pipe) leave the size unset
+                    available = Path(path).stat().st_size - offset
+                    size = min(chunk_size, available) if chunk_size not in (0, 0xFFFFFFFF) else available
+                    if size < 2:
+                        return None
+                    break
+                else:
+                    f.seek(chunk_size + chunk_size % 2, 1)
+    except (OSError, struct.error):
+        return None
+
+    return np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(size // 2,))
@@ -0,0 +1,148 @@
+import threading
+import cv2
+import numpy as np
+from pathlib import Path
+from app.config import settings
+from app.services import tracing
+from app.services.metrics import stage
+from app.utils import video_utils
+
+class _HaarDetector:
+    """OpenCV's bundled frontal-face cascade: cheap, no extra dependency."""
+
+    def __init__(self):
+        self.cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        self.lock = threading.Lock()
+
+    def __call__(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        with self.lock:
+            faces = self.cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(24, 24))
+        if len(faces) == 0:
+            return None
+        # Largest face
+        x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+        return int(x), int(y), int(w), int(h)
+
+class _MtcnnDetector:
+    """MTCNN, the detector the training crops were made with (celebdf_preprocessing)."""
+
+    def __init__(self):
+        from mtcnn import MTCNN
+        self.detector = MTCNN()
+        self.lock = threading.Lock()
+
+    def __call__(self, frame):
+        with self.lock:
+            faces = self.detector.detect_faces(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if not faces:
+            return None
+        # Most confident face, as in training
+        x, y, w, h = max(faces, key=lambda f: f['confidence'])['box']
+        return int(x), int(y), int(w), int(h)
+
+_DETECTORS = {"haar": _HaarDetector, "mtcnn": _MtcnnDetector}
+_detector_instances = {}
+_detector_lock = threading.Lock()
+
+def get_detector(name: str = None):
+    name = name or settings.FACE_DETECTOR
+    with _detector_lock:
+        if name not in _detector_instances:
+            if name not in _DETECTORS:
+                raise ValueError(f"Unknown face detector: {name}")
+            _detector_instances[name] = _DETECTORS[name]()
+        return _detector_instances[name]
+
+class FaceTracker:
+    """
+    Per-video face cropper. The detector only runs on keyframes (every
+    detect_every sampled frames, or when tracking is lost); in between the
+    last face is followed by template matching in a window around its box.
+    Detection and tracking work on a downscaled grey copy of the frame, the
+    crop itself is taken from the full-resolution frame.
+    """
+
+    def __init__(self, detector=None, detect_every: int = None, detect_width: int = None, min_track_score: float = None):
+        self.detector = detector or get_detector()
+        self.detect_every = detect_every or settings.FACE_DETECT_EVERY
+        self.detect_width = detect_width or settings.FACE_DETECT_WIDTH
+        self.min_track_score = min_track_score if min_track_score is not None else settings.FACE_TRACK_MIN_SCORE
+
+        self._box = None
+        self._template = None
+        self._since_detect = 0
+        self.detections = 0
+        self.tracked = 0
+
+    def crop(self, frame):
+        """Model-size face crop for this frame, or None if it has no face."""
+        scale = min(1.0, self.detect_width / frame.shape[1])
+        small = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else frame
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        box = None
+        if self._box is not None and self._since_detect < self.detect_every:
+            box = self._track(gray)
+            if box is not None:
+                self._since_detect += 1
+                self.tracked += 1
+
+        if box is None:
+            box = self.detector(small)
+            self._since_detect = 1
+            self.detections += 1
+
+        if box is None:
+            self._box = self._template = None
+            return None
+
+        x, y, w, h = box
+        self._box = box
+        self._template = gray[max(0, y):y + h, max(0, x):x + w].copy()
+
+        # Back to full resolution; clamp like the training crops
+        x, y, w, h = (int(round(v / scale)) for v in box)
+        x, y = max(0, x), max(0, y)
+        face = frame[y:y + h, x:x + w]
+        if face.size == 0:
+            return None
+        return cv2.resize(face, settings.INPUT_SHAPE[:2])
+
+    def _track(self, gray):
+        x, y, w, h = self._box
+        if self._template is None or self._template.size == 0:
+            return None
+
+        # Search window: the previous box grown by half its size on each side
+        x0, y0 = max(0, x - w // 2), max(0, y - h // 2)
+        x1, y1 = min(gray.shape[1], x + w + w // 2), min(gray.shape[0], y + h + h // 2)
+        search = gray[y0:y1, x0:x1]
+        th, tw = self._template.shape[:2]
+        if search.shape[0] < th or search.shape[1] < tw:
+            return None
+
+        result = cv2.matchTemplate(search, self._template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (mx, my) = cv2.minMaxLoc(result)
+        if score < self.min_track_score:
+            return None
+        return x0 + mx, y0 + my, tw, th
+
+def extract_face_crops(video_path: Path):
+    """
+    Samples frames like extract_frames but returns batched face crops,
+    skipping frames without a face.
+    """
+    tracker = FaceTracker()
+    crops = []
+    sampled = 0
+
+    with stage("face_crop"):
+        for frame in video_utils.iter_frames(video_path, resize=False):
+            sampled += 1
+            face = tracker.crop(frame)
+            if face is not None:
+                crops.append(face)
+
+            tracing.annotate(crops=len(crops), sampled=sampled, detections=tracker.detections, tracked=tracker.tracked)
+    return np.array(crops), sampled
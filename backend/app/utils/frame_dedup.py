@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+
+from app.services.metrics import stage
+
+# Set bits per byte value, for Hamming distances between packed hashes
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+THUMBNAIL_SIZE = 32
+# Thumbnail comparisons per frame beyond the previous frame's cluster, nearest hashes first
+MAX_CANDIDATES = 4
+
+def thumbnails(frames, size: int = THUMBNAIL_SIZE):
+    """size x size grey thumbnail per frame, as int16 so differences don't wrap."""
+    thumbs = np.empty((len(frames), size, size), dtype=np.int16)
+    for i, frame in enumerate(frames):
+        # Strided first: INTER_AREA straight from full size costs more than the rest of the
+        # pass, and still averages a few samples per cell from here
+        step = max(1, min(frame.shape[:2]) // (2 * size))
+        frame = np.ascontiguousarray(frame[::step, ::step])
+        grey = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        thumbs[i] = cv2.resize(grey, (size, size), interpolation=cv2.INTER_AREA)
+    return thumbs
+
+def dhash(thumbs, size: int = 8):
+    """
+    64-bit difference hash per thumbnail: shrunk to (size + 1) x size pixels,
+    each bit records whether a pixel is brighter than its left neighbour.
+    Returns an array of shape (n, size * size // 8), dtype uint8.
+    """
+    bits = np.empty((len(thumbs), size, size), dtype=bool)
+    for i, thumb in enumerate(thumbs):
+        small = cv2.resize(thumb.astype(np.float32), (size + 1, size), interpolation=cv2.INTER_AREA)
+        bits[i] = small[:, 1:] > small[:, :-1]
+    return np.packbits(bits.reshape(len(thumbs), -1), axis=1)
+
+def cluster(frames, max_distance: int, max_pixel_diff: int):
+    """
+    Groups near-duplicate frames. The hash only proposes candidates: the
+    previous frame's cluster, else the MAX_CANDIDATES earlier
+    representatives nearest it within max_distance bits. A frame joins a candidate only if no pixel of its
+    32x32 thumbnail differs from the representative's by more than
+    max_pixel_diff grey levels, so a changed face on a static background
+    (which barely moves the whole-frame hash) still gets its own cluster.
+    Comparing against representatives rather than the previous frame keeps
+    a slow drift (a pan, a fade) from chaining distinct frames together.
+    Returns (labels, representatives): the cluster of every frame, and the
+    index of the frame standing in for each cluster.
+    """
+    with stage("frame_dedup"):
+        thumbs = thumbnails(frames)
+        hashes = dhash(thumbs)
+        labels = np.empty(len(frames), dtype=np.int64)
+        representatives = []
+        representative_hashes = np.empty_like(hashes)
+
+        def same(i, cluster_id):
+            return np.abs(thumbs[i] - thumbs[representatives[cluster_id]]).max() <= max_pixel_diff
+
+        for i, frame_hash in enumerate(hashes):
+            if i > 0:
+                # Consecutive frames are the usual duplicates: try the previous frame's cluster first
+                previous = labels[i - 1]
+                if same(i, previous):
+                    labels[i] = previous
+                    continue
+                distances = _POPCOUNT[representative_hashes[:len(representatives)] ^ frame_hash].sum(axis=1)
+                near = np.flatnonzero(distances <= max_distance)
+                near = near[np.argsort(distances[near], kind="stable")[:MAX_CANDIDATES]]
+                match = next((c for c in near if same(i, c)), None)
+                if match is not None:
+                    labels[i] = match
+                    continue
+            labels[i] = len(representatives)
+            representative_hashes[len(representatives)] = frame_hash
+            representatives.append(i)
+    return labels, np.array(representatives, dtype=np.int64)
@@ -0,0 +1,95 @@
+import json
+import os
+import subprocess
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.services.metrics import stage
+from app.utils import video_utils, audio_utils
+
+def probe(media_path: Path):
+    """Container/stream facts from a single ffprobe header read."""
+    command = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration:stream=codec_type,width,height,avg_frame_rate",
+        "-of", "json",
+        str(media_path)
+    ]
+    with stage("ffprobe"):
+        result = subprocess.run(command, capture_output=True, text=True, check=True)
+    info = json.loads(result.stdout or "{}")
+
+    streams = info.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+    fps = None
+    if video and video.get("avg_frame_rate", "0/0") != "0/0":
+        num, den = video["avg_frame_rate"].split("/")
+        fps = float(num) / float(den) if float(den) else None
+
+    duration = info.get("format", {}).get("duration")
+    return {
+        "has_video": video is not None,
+        "has_audio": audio is not None,
+        "width": video.get("width") if video else None,
+        "height": video.get("height") if video else None,
+        "fps": fps,
+        "duration": float(duration) if duration not in (None, "N/A") else None,
+    }
+
+def demux(media_path: Path, with_audio: bool = True):
+    """
+    Decodes the container once and returns (frames, samples): the sampled
+    model-size frames from stdout and the 16 kHz mono PCM from a second pipe.
+    """
+    if not with_audio:
+        return video_utils.extract_frames(media_path, backend="ffmpeg"), np.empty((0,), dtype=np.float32)
+
+    if os.name != "posix":
+        # pass_fds is POSIX-only; fall back to one decode per stream
+        return video_utils.extract_frames(media_path, backend="ffmpeg"), audio_utils.extract_audio(media_path)
+
+    audio_read, audio_write = os.pipe()
+    command = (
+        ["ffmpeg", "-v", "error", "-i", str(media_path)]
+        + video_utils.ffmpeg_frame_args() + ["pipe:1"]
+        + audio_utils.ffmpeg_pcm_args() + [f"pipe:{audio_write}"]
+    )
+
+    try:
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            pass_fds=(audio_write,)
+        )
+    finally:
+        os.close(audio_write)
+
+    # Both pipes must be drained together or ffmpeg blocks on whichever fills first
+    pcm = {}
+    def read_audio():
+        with os.fdopen(audio_read, "rb") as stream:
+            pcm["buffer"] = stream.read()
+
+    audio_reader = threading.Thread(target=read_audio, name="demux-audio", daemon=True)
+    audio_reader.start()
+
+    try:
+        with stage("ffmpeg_demux"):
+            frames = video_utils.read_raw_frames(process.stdout)
+            _, stderr = process.communicate()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        audio_reader.join()
+
+    if process.returncode != 0:
+        raise RuntimeError(f"FFmpeg demux failed: {stderr.decode(errors='replace').strip()}")
+
+    return frames, audio_utils.pcm_to_float(pcm.get("buffer", b""))
@@ -1,31 +1,100 @@
+import subprocess
 import cv2
 import numpy as np
 from pathlib import Path
 from app.config import settings
+from app.services import tracing
+from app.services.metrics import stage
 
-def extract_frames(video_path: Path):
-    frames = []
+def extract_frames(video_path: Path, backend: str = None):
+    """
+    Samples every FRAME_INTERVAL-th frame, resized to the model input size.
+    backend: "opencv" (grab/retrieve) or "ffmpeg" (filtered raw pipe),
+    defaults to settings.FRAME_BACKEND.
+    """
+    backend = backend or settings.FRAME_BACKEND
+
+    if backend == "ffmpeg":
+        with stage("frame_decode_ffmpeg"):
+            frames = _extract_frames_ffmpeg(video_path)
+            tracing.annotate(frames=len(frames), shape=frames.shape[1:], dtype=str(frames.dtype))
+    elif backend == "opencv":
+        with stage("frame_decode_opencv"):
+            frames = _extract_frames_opencv(video_path)
+            tracing.annotate(frames=len(frames), shape=frames.shape[1:], dtype=str(frames.dtype))
+    else:
+        raise ValueError(f"Unknown frame backend: {backend}")
+
+    return frames
+
+def iter_frames(video_path: Path, resize: bool = True):
+    """
+    Yields every FRAME_INTERVAL-th frame as it is decoded. Frames are resized
+    to the model input size unless resize is False (e.g. for face cropping).
+    """
     vidcap = cv2.VideoCapture(str(video_path))
-    
+
     try:
         count = 0
         while vidcap.isOpened():
-            success, frame = vidcap.read()
-            if not success:
-                break
-            
             if count % settings.FRAME_INTERVAL == 0:
-                frame = cv2.resize(frame, settings.INPUT_SHAPE[:2])
-                frames.append(frame)
+                # Kept frame: decode, convert and copy out
+                success, frame = vidcap.read()
+                if not success:
+                    break
+                if resize:
+                    frame = cv2.resize(frame, settings.INPUT_SHAPE[:2])
+                yield frame
+            elif not vidcap.grab():
+                # Skipped frame: advance the demuxer/decoder only
+                break
             count += 1
     finally:
         vidcap.release()
 
-        # Debug prints
-    print(f"Extracted {len(frames)} frames")
-    if len(frames) > 0:
-        print(f"Frame shape: {frames[0].shape}")
-        print(f"Frame data type: {frames[0].dtype}")
-        print(f"Frame value range: {frames[0].min()} to {frames[0].max()}")
-    
+def _extract_frames_opencv(video_path: Path):
+    return np.array(list(iter_frames(video_path)))
+
+def ffmpeg_frame_args():
+    """ffmpeg output options that emit the sampled, resized frames as raw bgr24."""
+    height, width = settings.INPUT_SHAPE[:2]
+
+    # select keeps the same frames as the OpenCV path (every FRAME_INTERVAL-th),
+    # scale uses bilinear to match cv2.resize
+    return [
+        "-map", "0:v:0",
+        "-vf", f"select=not(mod(n\\,{settings.FRAME_INTERVAL})),scale={width}:{height}:flags=bilinear",
+        "-vsync", "vfr",
+        "-f", "rawvideo",
+        "-pix_fmt", "bgr24"
+    ]
+
+def read_raw_frames(stream):
+    """Reads bgr24 frames written by ffmpeg_frame_args() until EOF."""
+    height, width = settings.INPUT_SHAPE[:2]
+    frame_bytes = height * width * 3
+
+    frames = []
+    while True:
+        buffer = stream.read(frame_bytes)
+        if len(buffer) < frame_bytes:
+            break
+        frames.append(np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 3))
     return np.array(frames)
+
+def _extract_frames_ffmpeg(video_path: Path):
+    command = ["ffmpeg", "-v", "error", "-i", str(video_path)] + ffmpeg_frame_args() + ["pipe:1"]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    try:
+        frames = read_raw_frames(process.stdout)
+        _, stderr = process.communicate()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+    if process.returncode != 0:
+        raise RuntimeError(f"FFmpeg frame extraction failed: {stderr.decode(errors='replace').strip()}")
+
+    return frames
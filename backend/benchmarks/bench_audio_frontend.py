@@ -0,0 +1,66 @@
+"""
+Compares the two audio front ends on AudioModel's windowed inputs:
+librosa MFCCs in NumPy (AUDIO_FRONTEND=librosa) against the in-graph
+MfccLayer (AUDIO_FRONTEND=tf) as a traced graph, for the features alone and for features
+plus a stand-in audio model. Reports the median per batch of windows.
+
+Run from the backend directory:
+    python -m benchmarks.bench_audio_frontend --windows 1 4 16 --repeats 20
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import tensorflow as tf
+
+from app.config import settings
+from app.models.audio_frontend import MfccLayer, compile_pcm_model, with_frontend
+from app.models.audio_model import WINDOW_SAMPLES, WINDOW_STEPS, audio_model
+from benchmarks import synthetic
+
+def librosa_features(windows):
+    return audio_model._features(list(windows))
+
+def median_ms(fn, repeats: int):
+    fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--model-scale", type=int, default=1, help="Width multiplier for the stand-in audio model")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = synthetic.build_stub_models(Path(tmp), scale=args.model_scale)
+        model = tf.keras.models.load_model(paths["AUDIO_MODEL_PATH"])
+    layer = MfccLayer(settings.AUDIO_SAMPLE_RATE, settings.N_MFCC, WINDOW_STEPS)
+    features = tf.function(layer, input_signature=[tf.TensorSpec([None, None], tf.float32)])
+    # Compiled the way AudioModel serves it
+    pcm_model = compile_pcm_model(with_frontend(model, settings.AUDIO_SAMPLE_RATE, settings.N_MFCC, WINDOW_STEPS))
+
+    print(f"{'windows':>8} {'librosa ms':>11} {'tf ms':>9} {'speed-up':>9} {'librosa+model':>14} {'pcm model':>10} {'speed-up':>9}")
+    rng = np.random.default_rng(0)
+    for count in args.windows:
+        windows = (rng.standard_normal((count, WINDOW_SAMPLES)) * 0.1).astype(np.float32)
+
+        librosa_ms = median_ms(lambda: librosa_features(windows), args.repeats)
+        tf_ms = median_ms(lambda: features(windows).numpy(), args.repeats)
+        librosa_model_ms = median_ms(lambda: model(librosa_features(windows), training=False).numpy(), args.repeats)
+        pcm_model_ms = median_ms(lambda: pcm_model(windows), args.repeats)
+        print(
+            f"{count:>8} {librosa_ms:>11.2f} {tf_ms:>9.2f} {librosa_ms / tf_ms:>8.2f}x"
+            f" {librosa_model_ms:>14.2f} {pcm_model_ms:>10.2f} {librosa_model_ms / pcm_model_ms:>8.2f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares loading 16 kHz mono int16 WAV clips through librosa.load, the
+ffmpeg transcode pipe, and the memory-mapped fast path.
+
+Run from the backend directory:
+    python -m benchmarks.bench_audio_loading --clips 200 --seconds 2 10 60
+"""
+import argparse
+import shutil
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import librosa
+import numpy as np
+
+from app.config import settings
+from app.models.audio_model import WINDOW_SAMPLES
+from app.utils import audio_utils
+
+def make_wav(path: Path, seconds: float):
+    rng = np.random.default_rng(0)
+    samples = (rng.standard_normal(int(seconds * settings.AUDIO_SAMPLE_RATE)) * 3000).astype("<i2")
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(settings.AUDIO_SAMPLE_RATE)
+        w.writeframes(samples.tobytes())
+
+def load_librosa(path):
+    y, _ = librosa.load(path, sr=settings.AUDIO_SAMPLE_RATE)
+    return y
+
+def load_ffmpeg(path):
+    return audio_utils.extract_audio(path)
+
+def load_mmap(path):
+    # What the model touches: the first window converted to float
+    pcm = audio_utils.read_pcm16_wav(path)
+    return pcm[:WINDOW_SAMPLES].astype(np.float32) / 32768.0
+
+def time_loader(fn, path, clips):
+    fn(path)  # warm caches / imports
+    start = time.perf_counter()
+    for _ in range(clips):
+        fn(path)
+    return (time.perf_counter() - start) / clips * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clips", type=int, default=200, help="Loads per clip length")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[2, 10, 60])
+    args = parser.parse_args()
+
+    loaders = {"librosa": load_librosa, "mmap": load_mmap}
+    if shutil.which("ffmpeg"):
+        loaders["ffmpeg"] = load_ffmpeg
+    else:
+        print("ffmpeg not found; skipping the transcode path\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'clip':>8} " + " ".join(f"{name + ' ms':>12}" for name in loaders) + f" {'speed-up':>10}")
+        for seconds in args.seconds:
+            path = Path(tmp) / f"clip_{seconds}s.wav"
+            make_wav(path, seconds)
+            assert audio_utils.read_pcm16_wav(path) is not None
+
+            timings = {name: time_loader(fn, path, args.clips) for name, fn in loaders.items()}
+            baseline = timings.get("ffmpeg", timings["librosa"])
+            print(
+                f"{seconds:>7}s "
+                + " ".join(f"{timings[name]:>12.3f}" for name in loaders)
+                + f" {baseline / timings['mmap']:>9.1f}x"
+            )
+
+if __name__ == "__main__":
+    main()
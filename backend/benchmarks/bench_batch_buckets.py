@@ -0,0 +1,80 @@
+"""
+Compares scoring frame batches of arbitrary sizes (as extract_frames and
+the scheduler produce them) through the video ensemble:
+- unbucketed: one graph with an unknown batch dimension, fed every size
+- bucketed: VideoModel.score, split/padded to VIDEO_BATCH_BUCKETS, every
+  bucket traced at warm-up
+and reports latency per frame and the traces each path took after
+warm-up (backends.trace_counts for the bucketed path).
+
+Uses random-weight stand-in models (benchmarks.synthetic).
+
+Run from the backend directory:
+    python -m benchmarks.bench_batch_buckets --requests 100 --max-frames 70
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks import synthetic
+
+def run(fn, sizes, frames):
+    timings = []
+    for size in sizes:
+        start = time.perf_counter()
+        fn(frames[:size])
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--max-frames", type=int, default=70, help="Batch sizes are drawn from 1..max-frames")
+    parser.add_argument("--model-scale", type=int, default=1, help="Width multiplier for the stand-in models")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic.use_stub_models(Path(tmp), scale=args.model_scale)
+
+        # Imported only now: settings are read from the env at import time
+        import tensorflow as tf
+        from app.config import settings
+        from app.models import backends
+        from app.models.video_model import video_model
+
+        video_model.warm_up()
+        model, model_cdf = video_model.model, video_model.modelCdf
+
+    unbucketed_traces = 0
+
+    @tf.function(input_signature=[tf.TensorSpec((None,) + tuple(settings.INPUT_SHAPE), tf.uint8)])
+    def unbucketed(frames):
+        nonlocal unbucketed_traces
+        unbucketed_traces += 1
+        x = tf.cast(frames, tf.float32) / 255.0
+        return (model(x, training=False) + model_cdf(x, training=False)) / 2.0
+
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 256, (args.max_frames,) + tuple(settings.INPUT_SHAPE), dtype=np.uint8)
+    sizes = rng.integers(1, args.max_frames + 1, args.requests)
+    unbucketed(frames[:1])  # Its single trace, done up front like the bucketed warm-up
+    traces_before = sum(backends.trace_counts().values())
+
+    results = {
+        "unbucketed": (run(lambda batch: unbucketed(batch).numpy(), sizes, frames), unbucketed_traces - 1),
+        "bucketed": (run(video_model.score, sizes, frames), sum(backends.trace_counts().values()) - traces_before),
+    }
+
+    print(f"buckets {settings.VIDEO_BATCH_BUCKETS}, {args.requests} batches of 1-{args.max_frames} frames\n")
+    print(f"{'path':<12} {'ms/frame':>9} {'p50 ms':>8} {'p99 ms':>8} {'total s':>8} {'retraces':>9}")
+    for name, (timings, retraces) in results.items():
+        print(
+            f"{name:<12} {timings.sum() / sizes.sum():>9.3f} {np.percentile(timings, 50):>8.1f}"
+            f" {np.percentile(timings, 99):>8.1f} {timings.sum() / 1000:>8.2f} {retraces:>9}"
+        )
+
+if __name__ == "__main__":
+    main()
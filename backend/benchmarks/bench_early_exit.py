@@ -0,0 +1,78 @@
+"""
+Measures how many frames sequential early exit scores, and how often its
+verdict agrees with scoring every frame, on synthetic per-frame score
+distributions (clearly real, clearly fake, borderline).
+
+The scorer is simulated so the benchmark runs without the models; the
+frame cost is charged per frame so wall time reflects inference savings.
+
+Run from the backend directory:
+    python -m benchmarks.bench_early_exit --frames 600 --frame-cost-ms 20
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.early_exit import score_until_settled
+
+THRESHOLD = 0.4  # settings.VIDEO_THRESHOLD
+
+SCENARIOS = {
+    # name: (beta a, beta b) of the per-frame fake probability
+    "clearly_real": (1.5, 12.0),
+    "clearly_fake": (9.0, 2.0),
+    "leaning_fake": (5.0, 5.0),
+    "borderline": (4.0, 6.0),
+}
+
+def make_scorer(scores: np.ndarray, frame_cost_s: float):
+    def score(indices):
+        if frame_cost_s:
+            time.sleep(frame_cost_s * len(indices))
+        return scores[indices]
+    return score
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=600, help="Sampled frames per video (600 = 10 min at 30 fps, interval 10)")
+    parser.add_argument("--trials", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=16)
+    parser.add_argument("--min-frames", type=int, default=16)
+    parser.add_argument("--z", type=float, default=2.58)
+    parser.add_argument("--frame-cost-ms", type=float, default=0.0, help="Simulated inference cost per frame")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame_cost_s = args.frame_cost_ms / 1000.0
+    indices = np.arange(args.frames)
+
+    print(f"{'scenario':<14} {'frames used':>12} {'saved':>8} {'agreement':>10} {'time full':>10} {'time early':>11}")
+    for name, (a, b) in SCENARIOS.items():
+        used, agree, full_time, early_time = [], 0, 0.0, 0.0
+        for _ in range(args.trials):
+            scores = rng.beta(a, b, size=args.frames)
+            scorer = make_scorer(scores, frame_cost_s)
+
+            start = time.perf_counter()
+            full_mean = scorer(indices).mean()
+            full_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            early_mean, frames_used = score_until_settled(
+                indices, scorer, THRESHOLD,
+                chunk_size=args.chunk_size, z=args.z, min_frames=args.min_frames
+            )
+            early_time += time.perf_counter() - start
+
+            used.append(frames_used)
+            agree += (full_mean > THRESHOLD) == (early_mean > THRESHOLD)
+
+        mean_used = np.mean(used)
+        print(
+            f"{name:<14} {mean_used:>12.1f} {1 - mean_used / args.frames:>8.1%} {agree / args.trials:>10.1%}"
+            f" {full_time / args.trials:>9.3f}s {early_time / args.trials:>10.3f}s"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Measures what perceptual-hash frame dedup saves in DetectionService.score_video
+on sampled frames of different kinds of content:
+- static: one still frame with codec-like noise (screen recording, paused video)
+- slideshow: a few slides, each held for a run of frames
+- talking_head: a static background with a face-sized region changing every frame
+- moving: a camera pan, so consecutive frames differ
+and reports model calls, wall time and the score change against scoring
+every frame.
+
+Uses random-weight stand-in models (benchmarks.synthetic) unless
+--real-models is given; pass --model-scale to make each stand-in call
+heavier. Random weights say little about score changes: check those with
+--real-models (the configured / HF weights) on real clips via --videos.
+
+Run from the backend directory:
+    python -m benchmarks.bench_frame_dedup --frames 600
+    python -m benchmarks.bench_frame_dedup --real-models --videos clips/*.mp4
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from benchmarks import synthetic
+
+def noisy(frame, rng, amplitude: int = 3):
+    noise = rng.integers(-amplitude, amplitude + 1, frame.shape)
+    return np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+def scene(rng, height: int, width: int):
+    """Smooth blobs of colour, closer to real footage than per-pixel noise."""
+    coarse = rng.integers(0, 256, (max(2, height // 32), max(2, width // 32), 3), dtype=np.uint8)
+    return cv2.resize(coarse, (width, height), interpolation=cv2.INTER_CUBIC)
+
+def make_frames(kind: str, n: int, shape, rng):
+    height, width = shape[:2]
+    if kind == "static":
+        base = scene(rng, height, width)
+        return np.stack([noisy(base, rng) for _ in range(n)])
+    if kind == "slideshow":
+        slides = [scene(rng, height, width) for _ in range(8)]
+        return np.stack([noisy(slides[i * len(slides) // n], rng) for i in range(n)])
+    if kind == "talking_head":
+        base = scene(rng, height, width)
+        frames = np.stack([noisy(base, rng) for _ in range(n)])
+        # A face-sized region in the middle changes every frame
+        top, left = height // 3, width // 3
+        for frame in frames:
+            frame[top:top + height // 3, left:left + width // 3] = scene(rng, height // 3, width // 3)
+        return frames
+    if kind == "moving":
+        # A camera pan across a wide scene, 8 pixels per sampled frame
+        canvas = scene(rng, height, width + 8 * n)
+        return np.stack([canvas[:, 8 * i:8 * i + width] for i in range(n)])
+    raise ValueError(kind)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=600, help="Sampled frames per video (600 = 10 min at 30 fps, interval 10)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--model-scale", type=int, default=1, help="Width multiplier for the stand-in models")
+    parser.add_argument("--real-models", action="store_true", help="Score with the configured models instead of stand-ins")
+    parser.add_argument("--videos", nargs="*", type=Path, default=[], help="Real clips to compare on, instead of synthetic content")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic.isolate_app_dirs(Path(tmp))
+        if not args.real_models:
+            synthetic.use_stub_models(Path(tmp), scale=args.model_scale)
+
+        # Imported only now: settings are read from the env at import time
+        from app.config import settings
+        from app.models.video_model import video_model
+        from app.services.detection_service import DetectionService
+        from app.utils import video_utils
+
+        video_model.warm_up()
+        service = DetectionService()
+
+        calls = 0
+        score_frames = service.score_frames
+
+        def counting_score_frames(frames):
+            nonlocal calls
+            calls += len(frames)
+            return score_frames(frames)
+
+        service.score_frames = counting_score_frames
+
+        def run(frames, dedup: bool):
+            nonlocal calls
+            settings.FRAME_DEDUP = dedup
+            timings = []
+            for _ in range(args.repeats):
+                calls = 0
+                start = time.perf_counter()
+                mean, _, ratio = service.score_video(frames)
+                timings.append(time.perf_counter() - start)
+            return mean, ratio, calls, min(timings)
+
+        if args.videos:
+            contents = [(path.name, lambda path=path: video_utils.extract_frames(path)) for path in args.videos]
+        else:
+            rng = np.random.default_rng(0)
+            contents = [
+                (kind, lambda kind=kind: make_frames(kind, args.frames, settings.INPUT_SHAPE, rng))
+                for kind in ("static", "slideshow", "talking_head", "moving")
+            ]
+
+        print(
+            f"{'real' if args.real_models else 'stand-in'} models, max distance {settings.FRAME_DEDUP_MAX_DISTANCE} bits,"
+            f" max pixel diff {settings.FRAME_DEDUP_MAX_PIXEL_DIFF}\n"
+        )
+        print(f"{'content':<20} {'frames':>7} {'scored':>7} {'dedup':>7} {'full s':>8} {'dedup s':>8} {'speedup':>8} {'|score diff|':>13}")
+        for name, load in contents:
+            frames = load()
+            full_mean, _, _, full_time = run(frames, dedup=False)
+            dedup_mean, ratio, scored, dedup_time = run(frames, dedup=True)
+            print(
+                f"{name[:20]:<20} {len(frames):>7} {scored:>7} {ratio:>7.1%} {full_time:>8.3f} {dedup_time:>8.3f}"
+                f" {full_time / dedup_time:>7.1f}x {abs(full_mean - dedup_mean):>13.5f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compares frame sampling throughput of the legacy read-every-frame loop
+against the grab/retrieve OpenCV sampler and the ffmpeg pipe sampler.
+
+Run from the backend directory:
+    python -m benchmarks.bench_frame_sampling --seconds 120
+    python -m benchmarks.bench_frame_sampling --video path/to/clip.mp4
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.utils import video_utils
+from benchmarks import synthetic
+
+def legacy_extract_frames(video_path: Path):
+    """The original extract_frames loop: decodes every frame, keeps every 10th."""
+    frames = []
+    vidcap = cv2.VideoCapture(str(video_path))
+    try:
+        count = 0
+        while vidcap.isOpened():
+            success, frame = vidcap.read()
+            if not success:
+                break
+            if count % settings.FRAME_INTERVAL == 0:
+                frames.append(cv2.resize(frame, settings.INPUT_SHAPE[:2]))
+            count += 1
+    finally:
+        vidcap.release()
+    return np.array(frames)
+
+def count_source_frames(video_path: Path):
+    vidcap = cv2.VideoCapture(str(video_path))
+    total = int(vidcap.get(cv2.CAP_PROP_FRAME_COUNT))
+    vidcap.release()
+    return total
+
+def run(name, fn, video_path: Path, source_frames: int, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        frames = fn(video_path)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"{name:<10} {len(frames):>8} sampled  {best:>8.2f}s  {source_frames / best:>10.1f} source fps")
+    return frames
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", type=Path, help="Existing clip to benchmark (default: synthetic 1080p)")
+    parser.add_argument("--seconds", type=int, default=60, help="Length of the synthetic clip")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path = args.video
+        if video_path is None:
+            video_path = Path(tmp) / "synthetic_1080p.mp4"
+            print(f"Generating {args.seconds}s 1080p clip at {video_path} ...")
+            synthetic.make_video(video_path, args.seconds, width=1920, height=1080)
+
+        source_frames = count_source_frames(video_path)
+        print(f"Source frames: {source_frames}, FRAME_INTERVAL: {settings.FRAME_INTERVAL}\n")
+
+        legacy = run("legacy", legacy_extract_frames, video_path, source_frames, args.repeats)
+        grab = run("opencv", lambda p: video_utils.extract_frames(p, backend="opencv"), video_path, source_frames, args.repeats)
+        print(f"\nopencv matches legacy: {np.array_equal(legacy, grab)}")
+        if shutil.which("ffmpeg") is None:
+            print("ffmpeg not found; skipping the ffmpeg sampler")
+            return
+        piped = run("ffmpeg", lambda p: video_utils.extract_frames(p, backend="ffmpeg"), video_path, source_frames, args.repeats)
+        if legacy.shape == piped.shape:
+            diff = np.abs(legacy.astype(np.int16) - piped.astype(np.int16)).mean()
+            print(f"ffmpeg mean abs pixel difference vs legacy: {diff:.2f}")
+        else:
+            print(f"ffmpeg frame count differs: {piped.shape[0]} vs {legacy.shape[0]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Concurrency load test for the FastAPI app: closed-loop clients post a mix
+of audio and video uploads to /detect at each concurrency level and the
+report gives p50/p90/p99 latency, throughput, rejections (429/503) and
+the saturation point, where adding clients stops adding throughput.
+
+Targets:
+    in-process (default)  the ASGI app driven through httpx.ASGITransport
+    --uvicorn             the app served by uvicorn on a local port, in this process
+    --url URL             an already running server (its own models and config)
+
+The first two use random-weight stand-in models (benchmarks.synthetic)
+unless --real-models is given, so they run offline.
+
+Run from the backend directory:
+    python -m benchmarks.load_test --concurrency 1 8 64 --requests 200
+    python -m benchmarks.load_test --uvicorn --mix video=0.3,audio=0.7
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --output report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks import synthetic
+
+CONTENT_TYPES = {"video": ("clip.mp4", "video/mp4"), "audio": ("clip.wav", "audio/wav")}
+
+def parse_mix(text: str):
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in CONTENT_TYPES:
+            raise argparse.ArgumentTypeError(f"Unknown payload kind: {kind}")
+        mix[kind] = float(weight or 1)
+    return mix
+
+def make_payloads(workdir: Path, args):
+    video = synthetic.make_video(workdir / "clip.mp4", args.video_seconds, args.width, args.height)
+    audio = synthetic.make_wav(workdir / "clip.wav", args.audio_seconds)
+    return {"video": video.read_bytes(), "audio": audio.read_bytes()}
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, total: int, payloads: dict, mix: dict, unique: bool, timeout: float):
+    kinds, weights = zip(*mix.items())
+    remaining = total
+    records = []
+    rng = random.Random(concurrency)
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            kind = rng.choices(kinds, weights)[0]
+            body = payloads[kind]
+            if unique:
+                # Trailing bytes change the digest so a remote result cache cannot answer
+                body += os.urandom(16)
+            filename, content_type = CONTENT_TYPES[kind]
+
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/detect", files={"file": (filename, body, content_type)}, timeout=timeout
+                )
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            records.append({"kind": kind, "status": status, "latency": time.perf_counter() - start})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return summarize(concurrency, records, elapsed)
+
+def summarize(concurrency: int, records: list, elapsed: float):
+    ok = np.array([r["latency"] for r in records if r["status"] == 200]) * 1000
+    statuses = {}
+    for r in records:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+
+    def pct(q):
+        return round(float(np.percentile(ok, q)), 2) if len(ok) else None
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(records),
+        "ok": int(len(ok)),
+        "rejected": statuses.get("429", 0) + statuses.get("503", 0),
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "p50_ms": pct(50),
+        "p90_ms": pct(90),
+        "p99_ms": pct(99),
+        "per_kind_p50_ms": {
+            kind: round(float(np.percentile([r["latency"] * 1000 for r in records if r["kind"] == kind and r["status"] == 200], 50)), 2)
+            for kind in {r["kind"] for r in records if r["status"] == 200}
+        },
+    }
+
+def saturation_point(levels: list, gain: float):
+    """
+    Highest concurrency that still paid off: the level after it adds less
+    than `gain` relative throughput or starts getting requests rejected.
+    """
+    levels = sorted(levels, key=lambda level: level["concurrency"])
+    for current, following in zip(levels, levels[1:]):
+        if following["rejected"] > 0 or following["throughput_rps"] < current["throughput_rps"] * (1 + gain):
+            return current
+    return None  # Still scaling at the highest level tried
+
+def print_report(levels: list, saturated):
+    print(f"{'clients':>8} {'ok':>6} {'rejected':>9} {'req/s':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}")
+    for level in levels:
+        print(
+            f"{level['concurrency']:>8} {level['ok']:>6} {level['rejected']:>9} {level['throughput_rps']:>9.2f}"
+            f" {level['p50_ms'] or 0:>9.1f} {level['p90_ms'] or 0:>9.1f} {level['p99_ms'] or 0:>9.1f}"
+        )
+    print()
+    if len(levels) < 2:
+        print("Run at least two concurrency levels to find the saturation point.")
+    elif saturated is None:
+        print("No saturation within the levels tried; throughput was still growing.")
+    else:
+        print(
+            f"Saturation at {saturated['concurrency']} concurrent clients:"
+            f" {saturated['throughput_rps']:.2f} req/s, p99 {saturated['p99_ms']} ms"
+        )
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_uvicorn(app):
+    import uvicorn
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="load-test-uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+async def run(args, payloads: dict, base_url: str = None, app=None):
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_connections=max(args.concurrency)))
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test")
+
+    levels = []
+    async with client:
+        # One request per payload kind first, so model warm-up is not measured
+        await run_level(client, 1, len(args.mix), payloads, args.mix, args.unique_payloads, args.timeout)
+        for concurrency in args.concurrency:
+            level = await run_level(
+                client, concurrency, max(args.requests, concurrency), payloads, args.mix, args.unique_payloads, args.timeout
+            )
+            levels.append(level)
+            print(f"  {concurrency:>4} clients: {level['throughput_rps']:.2f} req/s, p99 {level['p99_ms']} ms")
+    return levels
+
+def main():
+    parser = argparse.ArgumentParser()
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Load-test a running server instead of the in-process app")
+    target.add_argument("--uvicorn", action="store_true", help="Serve the app with uvicorn on a local port")
+    parser.add_argument("--real-models", action="store_true", help="Use the configured models instead of stand-ins")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("video=0.5,audio=0.5"))
+    parser.add_argument("--video-seconds", type=float, default=5)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=360)
+    parser.add_argument("--audio-seconds", type=float, default=10)
+    parser.add_argument("--unique-payloads", action="store_true", help="Defeat the result cache (default with --url)")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--saturation-gain", type=float, default=0.1, help="Minimum relative throughput gain that still counts as scaling")
+    parser.add_argument("--output", type=Path, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        payloads = make_payloads(workdir, args)
+
+        server = None
+        app = None
+        base_url = args.url
+        if args.url:
+            args.unique_payloads = True
+        else:
+            synthetic.isolate_app_dirs(workdir)
+            # Payloads repeat; cached results would measure the cache, not the pipeline
+            os.environ["RESULT_CACHE_ENABLED"] = "0"
+            if not args.real_models:
+                synthetic.use_stub_models(workdir / "models")
+
+            # Imported only now: settings are read from the env at import time
+            from app import main as app_main
+            from app.services.model_manager import model_manager
+
+            app = app_main.app
+            model_manager.start(background=False)
+            if args.uvicorn:
+                server, thread, base_url = start_uvicorn(app)
+
+        try:
+            levels = asyncio.run(run(args, payloads, base_url=base_url, app=app))
+        finally:
+            if server is not None:
+                server.should_exit = True
+                thread.join()
+
+    print()
+    saturated = saturation_point(levels, args.saturation_gain)
+    print_report(levels, saturated)
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "target": args.url or ("uvicorn" if args.uvicorn else "in-process"),
+            "mix": args.mix,
+            "levels": levels,
+            "saturation": saturated,
+        }, indent=2))
+
+if __name__ == "__main__":
+    main()
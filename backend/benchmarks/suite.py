@@ -0,0 +1,201 @@
+"""
+Offline benchmark suite for the serving hot paths: frame extraction,
+audio extraction, VideoModel.predict, AudioModel.predict and end-to-end
+/detect, on synthetic media with random-weight stand-in models (see
+benchmarks.synthetic).
+
+Each run is compared against a stored JSON baseline; a case whose median
+is more than --tolerance slower than its baseline is flagged and the run
+exits non-zero. Baselines are only comparable on the same machine and
+with the same media settings, so record one per machine:
+
+Run from the backend directory:
+    python -m benchmarks.suite --update-baseline
+    python -m benchmarks.suite
+    python -m benchmarks.suite --only detect --repeats 10
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import synthetic
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+def time_case(fn, repeats: int, warmup: int = 1):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "repeats": repeats,
+    }
+
+def machine_info():
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+def build_cases(args, workdir: Path):
+    """(name, fn) pairs; app modules are imported here, after the stub models are in place."""
+    import numpy as np
+    from fastapi.testclient import TestClient
+
+    from app import main as app_main
+    from app.models.audio_model import audio_model
+    from app.models.video_model import video_model
+    from app.services.model_manager import model_manager
+    from app.utils import audio_utils, video_utils
+
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    if not has_ffmpeg:
+        print("ffmpeg not found; skipping ffmpeg-backed cases\n")
+
+    video = synthetic.make_video(workdir / "clip.mp4", args.video_seconds, args.width, args.height, args.fps)
+    wav_16k = synthetic.make_wav(workdir / "clip_16k.wav", args.audio_seconds)
+    wav_44k = synthetic.make_wav(workdir / "clip_44k_stereo.wav", args.audio_seconds, sample_rate=44100, channels=2)
+    av_clip = None
+    if has_ffmpeg:
+        av_clip = synthetic.make_video(workdir / "clip_av.mp4", args.video_seconds, args.width, args.height, args.fps, with_audio=True)
+
+    model_manager.start(background=False)
+    if not model_manager.ready:
+        raise RuntimeError(f"Stub models failed to load: {model_manager.status()}")
+
+    frames = video_utils.extract_frames(video, backend="opencv")
+    samples = audio_utils.read_pcm16_wav(wav_16k).astype(np.float32) / 32768.0
+
+    client = TestClient(app_main.app)
+
+    def detect(path: Path, content_type: str, mode: str = "video"):
+        def run():
+            with path.open("rb") as f:
+                response = client.post(f"/detect?mode={mode}", files={"file": (path.name, f, content_type)})
+            response.raise_for_status()
+        return run
+
+    cases = [
+        ("extract_frames[opencv]", lambda: video_utils.extract_frames(video, backend="opencv")),
+        ("VideoModel.predict", lambda: video_model.predict(frames)),
+        ("AudioModel.predict", lambda: audio_model.predict(samples)),
+        ("detect[video]", detect(video, "video/mp4")),
+        ("detect[audio]", detect(wav_16k, "audio/wav")),
+    ]
+    if has_ffmpeg:
+        cases += [
+            ("extract_frames[ffmpeg]", lambda: video_utils.extract_frames(video, backend="ffmpeg")),
+            ("extract_audio", lambda: audio_utils.extract_audio(wav_44k)),
+            ("detect[combined]", detect(av_clip, "video/mp4", mode="combined")),
+        ]
+    return cases, client
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """Prints the comparison table; returns the names of regressed cases."""
+    regressions = []
+    print(f"{'case':<26} {'median ms':>11} {'baseline ms':>12} {'change':>9}  status")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<26} {result['median_ms']:>11.2f} {'-':>12} {'-':>9}  new")
+            continue
+
+        change = result["median_ms"] / base["median_ms"] - 1
+        if change > tolerance:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif change < -tolerance:
+            status = "faster"
+        else:
+            status = "ok"
+        print(f"{name:<26} {result['median_ms']:>11.2f} {base['median_ms']:>12.2f} {change:>+9.1%}  {status}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video-seconds", type=float, default=10)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--audio-seconds", type=float, default=30)
+    parser.add_argument("--model-scale", type=int, default=1, help="Width multiplier for the stand-in models")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", help="Run only cases whose name contains this")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown of the median before flagging")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--output", type=Path, help="Also write this run's results as JSON")
+    args = parser.parse_args()
+
+    config = {
+        "video_seconds": args.video_seconds,
+        "resolution": f"{args.width}x{args.height}@{args.fps}",
+        "audio_seconds": args.audio_seconds,
+        "model_scale": args.model_scale,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        synthetic.isolate_app_dirs(workdir)
+        # Uploads repeat, so the result cache would turn every /detect into a hit
+        os.environ["RESULT_CACHE_ENABLED"] = "0"
+        synthetic.use_stub_models(workdir / "models", scale=args.model_scale)
+
+        cases, client = build_cases(args, workdir)
+        results = {}
+        try:
+            for name, fn in cases:
+                if args.only and args.only not in name:
+                    continue
+                results[name] = time_case(fn, args.repeats)
+                print(f"  {name:<26} {results[name]['median_ms']:>10.2f} ms")
+        finally:
+            client.close()
+    print()
+
+    run = {"config": config, "machine": machine_info(), "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(run, indent=2))
+
+    if args.update_baseline:
+        if args.only and args.baseline.exists():
+            # Partial runs only refresh their own cases
+            stored = json.loads(args.baseline.read_text())
+            stored["results"].update(results)
+            results = stored["results"]
+        args.baseline.write_text(json.dumps({**run, "results": results}, indent=2))
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to record one")
+        return
+
+    stored = json.loads(args.baseline.read_text())
+    if stored.get("config") != config:
+        print(f"Warning: baseline was recorded with {stored.get('config')}, this run uses {config}")
+    if stored.get("machine") != run["machine"]:
+        print(f"Warning: baseline was recorded on {stored.get('machine')}")
+
+    regressions = compare(results, stored.get("results", {}), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Synthetic media and random-weight stand-in models so benchmarks and load
+tests run offline, without the Hugging Face weights or real clips.
+
+The stand-ins keep the production input/output shapes (224x224x3 frames
+with a 2-class softmax for both video models, 100x40x1 MFCC windows with
+a single sigmoid for audio) but are tiny, so timings reflect the serving
+code around the models rather than the networks themselves. Pass
+--model-scale to make them heavier.
+"""
+import os
+import shutil
+import subprocess
+import wave
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+VIDEO_INPUT_SHAPE = (224, 224, 3)
+AUDIO_INPUT_SHAPE = (100, 40, 1)
+
+def make_video(path: Path, seconds: float, width: int = 1280, height: int = 720, fps: int = 30, with_audio: bool = False):
+    """Moving noise (so the encoder cannot collapse frames), optionally muxed with a tone if ffmpeg is available."""
+    path = Path(path)
+    video_path = path.with_name(path.stem + "_video_only.mp4") if with_audio else path
+
+    writer = cv2.VideoWriter(str(video_path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    for i in range(int(seconds * fps)):
+        writer.write(np.roll(base, shift=i * 8, axis=1))
+    writer.release()
+
+    if with_audio:
+        if not shutil.which("ffmpeg"):
+            raise RuntimeError("ffmpeg is required to add an audio track")
+        subprocess.run([
+            "ffmpeg", "-v", "error", "-y",
+            "-i", str(video_path),
+            "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=44100:duration={seconds}",
+            "-c:v", "copy", "-c:a", "aac", "-shortest",
+            str(path)
+        ], check=True)
+        video_path.unlink()
+    return path
+
+def make_wav(path: Path, seconds: float, sample_rate: int = 16000, channels: int = 1):
+    """Noisy speech-band signal as 16-bit PCM WAV."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * rng.standard_normal(len(t))
+    samples = (np.clip(signal, -1, 1) * 32767).astype("<i2")
+    if channels > 1:
+        samples = np.repeat(samples[:, np.newaxis], channels, axis=1)
+
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(samples.tobytes())
+    return Path(path)
+
+def build_stub_models(model_dir: Path, scale: int = 1, seed: int = 0):
+    """Saves random-weight stand-ins for the three production models; returns their paths."""
+    import tensorflow as tf
+
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    tf.keras.utils.set_random_seed(seed)
+
+    def video_stub():
+        return tf.keras.Sequential([
+            tf.keras.Input(shape=VIDEO_INPUT_SHAPE),
+            tf.keras.layers.Conv2D(8 * scale, 3, strides=4, activation="relu"),
+            tf.keras.layers.Conv2D(16 * scale, 3, strides=2, activation="relu"),
+            tf.keras.layers.GlobalAveragePooling2D(),
+            tf.keras.layers.Dense(2, activation="softmax"),
+        ])
+
+    def audio_stub():
+        return tf.keras.Sequential([
+            tf.keras.Input(shape=AUDIO_INPUT_SHAPE),
+            tf.keras.layers.Conv2D(8 * scale, 3, activation="relu"),
+            tf.keras.layers.MaxPooling2D(2),
+            tf.keras.layers.GlobalAveragePooling2D(),
+            tf.keras.layers.Dense(1, activation="sigmoid"),
+        ])
+
+    paths = {
+        "VIDEO_MODEL_PATH": model_dir / "stub_faceforensics.keras",
+        "VIDEO_MODEL_CDF_PATH": model_dir / "stub_celebdf.keras",
+        "AUDIO_MODEL_PATH": model_dir / "stub_audio.keras",
+    }
+    video_stub().save(paths["VIDEO_MODEL_PATH"])
+    video_stub().save(paths["VIDEO_MODEL_CDF_PATH"])
+    audio_stub().save(paths["AUDIO_MODEL_PATH"])
+    return paths
+
+def use_stub_models(model_dir: Path, scale: int = 1):
+    """
+    Builds the stand-ins and points the app at them through the model path
+    env vars. Must run before anything imports app.config.
+    """
+    for name, path in build_stub_models(model_dir, scale=scale).items():
+        os.environ[name] = str(path)
+    os.environ["MODEL_VERSION"] = f"stub-x{scale}"
+
+def isolate_app_dirs(workdir: Path):
+    """Keeps uploads, jobs, traces and the result cache of a benchmark run out of the repo."""
+    workdir = Path(workdir)
+    for name in ("TEMP_DIR", "JOB_DIR", "TRACE_DIR"):
+        os.environ[name] = str(workdir / name.lower())
+    os.environ.pop("RESULT_CACHE_DIR", None)
@@ -0,0 +1,49 @@
+# test_audio_frontend.py
+# Parity check: the in-graph MFCC front end (MfccLayer) against the librosa
+# features audio/src/a_preprocessing.extract_features trained the model on.
+#   python test_audio_frontend.py [audio files...]
+import sys
+import numpy as np
+import librosa
+from app.models.audio_frontend import MfccLayer
+
+SR = 16000
+N_MFCC = 40
+MAX_LENGTH = 100
+TOLERANCE = 1e-5  # Relative to the largest coefficient: float32 rounding on values up to ~1000
+
+def extract_features(y):
+    # Same steps as a_preprocessing.load_audio + extract_features, minus the file I/O
+    if len(y) < SR:
+        y = np.pad(y, (0, SR - len(y)))
+    mfcc = librosa.feature.mfcc(y=y, sr=SR, n_mfcc=N_MFCC)
+    if mfcc.shape[1] < MAX_LENGTH:
+        mfcc = np.pad(mfcc, ((0, 0), (0, MAX_LENGTH - mfcc.shape[1])))
+    else:
+        mfcc = mfcc[:, :MAX_LENGTH]
+    return mfcc.T
+
+rng = np.random.default_rng(0)
+signals = {
+    "noise 1s": rng.standard_normal(SR).astype(np.float32) * 0.1,
+    "tone 3.2s": np.sin(2 * np.pi * 440 * np.arange(int(3.2 * SR)) / SR).astype(np.float32) * 0.5,
+    "chirp 5s": librosa.chirp(fmin=50, fmax=7000, sr=SR, duration=5).astype(np.float32),
+    "quiet noise 2s": rng.standard_normal(2 * SR).astype(np.float32) * 1e-4,
+    "silence 1s": np.zeros(SR, dtype=np.float32),
+}
+for file_path in sys.argv[1:]:
+    signals[file_path] = librosa.load(file_path, sr=SR)[0]
+
+layer = MfccLayer(sample_rate=SR, n_mfcc=N_MFCC, steps=MAX_LENGTH)
+failed = 0
+for name, y in signals.items():
+    expected = extract_features(y)
+    if len(y) < SR:
+        y = np.pad(y, (0, SR - len(y)))
+    actual = layer(y[np.newaxis]).numpy()[0, ..., 0]
+    diff = np.abs(actual - expected).max()
+    status = "OK" if diff <= TOLERANCE * np.abs(expected).max() else "MISMATCH"
+    failed += status != "OK"
+    print(f"{name:<20} max abs diff {diff:.2e} (feature range {np.abs(expected).max():.1f}) {status}")
+
+sys.exit(1 if failed else 0)
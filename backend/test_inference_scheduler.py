@@ -0,0 +1,68 @@
+# test_inference_scheduler.py
+# Checks that InferenceScheduler returns each request its own scores, that
+# requests take turns (a short request submitted behind a long one is scored
+# within a batch or two instead of after the long one), and that fast-lane
+# work from admission goes ahead of slow-lane work.
+#   python test_inference_scheduler.py
+import time
+import numpy as np
+from app.services.admission import Admission, FAST, SLOW, scheduler_priority
+from app.services.inference_scheduler import InferenceScheduler
+from app.services.worker_pool import WorkerPool
+
+BATCH_SIZE = 32
+BATCH_MS = 20  # Simulated model time per batch
+
+def score_fn(items):
+    time.sleep(BATCH_MS / 1000)
+    return items.astype(np.float32) * 2
+
+scheduler = InferenceScheduler(score_fn, batch_size=BATCH_SIZE, max_wait_ms=5, name="test")
+
+# Correct slices
+items = [np.arange(n) + 1000 * i for i, n in enumerate((5, 70, 1, 33))]
+futures = [scheduler.submit(x) for x in items]
+for x, future in zip(items, futures):
+    assert np.array_equal(future.result(), x * 2), "wrong scores returned"
+print("slices OK")
+
+# Fairness: 100 batches of long work queued first, then a short request
+long_future = scheduler.submit(np.arange(100 * BATCH_SIZE))
+time.sleep(0.05)
+started = time.perf_counter()
+short_future = scheduler.submit(np.arange(8))
+short_scores = short_future.result()
+short_latency = time.perf_counter() - started
+
+assert np.array_equal(short_scores, np.arange(8) * 2)
+assert not long_future.done(), "long request finished before the short one"
+print(f"short request scored in {short_latency * 1000:.0f} ms while the long one was still running")
+assert short_latency < 5 * BATCH_MS / 1000, "short request waited behind the long one"
+assert np.array_equal(long_future.result(), np.arange(100 * BATCH_SIZE) * 2)
+print("fairness OK")
+
+# Lanes: a short fast-lane clip submitted behind several long slow-lane ones
+admission = Admission({
+    FAST: WorkerPool(workers=1, queue_size=4, name="test-fast"),
+    SLOW: WorkerPool(workers=4, queue_size=4, name="test-slow"),
+})
+
+def score_frames(frames):
+    # What DetectionService.score_frames does with the scheduler
+    return scheduler.score(frames, priority=scheduler_priority())
+
+long_info = {"duration": 600.0, "width": 1280, "height": 720}
+short_info = {"duration": 3.0, "width": 1280, "height": 720}
+long_futures = [admission.submit(long_info, "video", score_frames, np.arange(50 * BATCH_SIZE)) for _ in range(4)]
+time.sleep(0.05)
+started = time.perf_counter()
+short_scores = admission.submit(short_info, "video", score_frames, np.arange(8)).result()
+short_latency = time.perf_counter() - started
+
+assert np.array_equal(short_scores, np.arange(8) * 2)
+assert not any(future.done() for future in long_futures), "a slow-lane request finished before the fast one"
+print(f"fast-lane request scored in {short_latency * 1000:.0f} ms behind 4 x 50 slow-lane batches")
+assert short_latency < 3 * BATCH_MS / 1000, "fast-lane request waited behind slow-lane batches"
+for future in long_futures:
+    assert np.array_equal(future.result(), np.arange(50 * BATCH_SIZE) * 2)
+print("lanes OK")
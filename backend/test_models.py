@@ -2,6 +2,9 @@
 from app.models.video_model import video_model
 from app.models.audio_model import audio_model
 
+video_model.load()
+audio_model.load()
+
 print("=== MODEL SUMMARIES ===")
 print("Video model output shape:", video_model.model.output_shape)
 print("Audio model output shape:", audio_model.model.output_shape)
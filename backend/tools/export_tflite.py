@@ -0,0 +1,262 @@
+"""
+Converts the production Keras models to TFLite for INFERENCE_BACKEND=tflite
+and reports how the converted models compare with the Keras path.
+
+Quantisation:
+    float    plain float32 conversion
+    dynamic  int8 weights, float activations (no calibration needed)
+    int8     full integer weights and activations, calibrated on sample
+             frames / MFCC windows taken from the --calibration media
+
+--audio-frontend prepends the in-graph MFCC front end to the audio model
+(app/models/audio_frontend.py), so audio.tflite takes raw PCM windows
+and serving needs no librosa; it converts with TFLite builtin ops only.
+That model is always exported as float: quantising the power spectrum
+(~100 dB of range) to int8 wrecks the MFCCs.
+
+The report has, per model:
+- mean and max absolute score difference against Keras
+- per-file verdict agreement
+- accuracy delta, when the evaluation media sit in real/ and fake/
+  folders
+- the latency speed-up at batch 1 and at a full batch, both backends
+  called the way serving calls them (batch buckets, traced Keras graphs)
+
+Run from the backend directory:
+    python -m tools.export_tflite --quantization dynamic --eval samples/
+    python -m tools.export_tflite --quantization int8 --calibration calib/ --eval samples/ --report tflite_report.json
+    python -m tools.export_tflite --models audio --audio-frontend --eval samples/
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+import numpy as np
+import tensorflow as tf
+
+from app.config import settings
+from app.models import backends
+from app.models.audio_frontend import with_frontend
+from app.models.audio_model import audio_model, WINDOW_SAMPLES, WINDOW_STEPS
+from app.models.video_model import video_model
+from app.utils import audio_utils, video_utils
+
+VIDEO_MODELS = ("faceforensics", "celebdf")
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".flac", ".ogg", ".m4a"}
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".webm"}
+
+def input_shape(name: str, audio_frontend: bool = False):
+    if name in VIDEO_MODELS:
+        return tuple(settings.INPUT_SHAPE)
+    if audio_frontend:
+        return (WINDOW_SAMPLES,)
+    return (WINDOW_STEPS, settings.N_MFCC, 1)
+
+def media_files(paths):
+    files = []
+    for path in paths or []:
+        path = Path(path)
+        candidates = sorted(path.rglob("*")) if path.is_dir() else [path]
+        files += [p for p in candidates if p.suffix.lower() in AUDIO_EXTENSIONS | VIDEO_EXTENSIONS]
+    return files
+
+def label_of(path: Path):
+    """1 for fake, 0 for real, None if no real/ or fake/ folder in the path."""
+    parts = {part.lower() for part in path.parts}
+    if "fake" in parts:
+        return 1
+    if "real" in parts:
+        return 0
+    return None
+
+def model_inputs(name: str, path: Path, audio_frontend: bool = False):
+    """Model-ready float32 inputs for one media file, or None if it has none for this model."""
+    is_video = path.suffix.lower() in VIDEO_EXTENSIONS
+    if name in VIDEO_MODELS:
+        if not is_video:
+            return None
+        frames = video_utils.extract_frames(path)
+        return frames.astype(np.float32) / 255.0 if len(frames) else None
+
+    audio = path
+    if is_video:
+        try:
+            audio = audio_utils.extract_audio(path)
+        except Exception as e:
+            print(f"  Skipping audio of {path}: {e}")
+            return None
+        if len(audio) == 0:
+            return None
+    windows = audio_model._load_windows(audio)
+    if not audio_frontend:
+        return audio_model._features(windows)
+    # Full-length windows only, so every file's windows stack into one batch
+    windows = [window for window in windows if len(window) == WINDOW_SAMPLES]
+    return np.stack(windows).astype(np.float32) if windows else None
+
+def head(name: str, outputs: np.ndarray):
+    """Per-sample fake probability, the way VideoModel/AudioModel read the outputs."""
+    if name in VIDEO_MODELS:
+        return video_model._head(outputs)
+    return outputs[:, 0]
+
+def load_keras(name: str, audio_frontend: bool = False):
+    if name in VIDEO_MODELS:
+        return video_model._load_keras(settings.model_path(name))
+    model = tf.keras.models.load_model(settings.model_path(name))
+    if audio_frontend:
+        model = with_frontend(model, settings.AUDIO_SAMPLE_RATE, settings.N_MFCC, WINDOW_STEPS)
+    return model
+
+def convert(model, name: str, quantization: str, calibration: np.ndarray = None):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization in ("dynamic", "int8"):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "int8":
+        if calibration is None or len(calibration) == 0:
+            raise ValueError(f"int8 quantisation of {name} needs --calibration media")
+        converter.representative_dataset = lambda: ([calibration[i:i + 1]] for i in range(len(calibration)))
+        # Integer kernels throughout; inputs and outputs stay float so the backend is a drop-in
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    return converter.convert()
+
+def median_ms(fn, batch, repeats: int):
+    fn(batch)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def serving_fn(name: str, model):
+    """
+    model called the way serving calls it, so the timings compare like with
+    like: batches split/padded to the batch buckets, and Keras video models
+    in a tf.function traced per bucket (as in VideoModel's ensemble) and the
+    audio model through AudioModel._compile (traced when it takes PCM).
+    """
+    if name in VIDEO_MODELS:
+        if isinstance(model, backends.TFLiteBackend):
+            fn = model
+        else:
+            compiled = tf.function(lambda x: model(x, training=False))
+            fn = lambda batch: compiled(tf.convert_to_tensor(batch)).numpy()
+        return lambda batch: backends.run_bucketed(fn, batch, settings.VIDEO_BATCH_BUCKETS)
+    fn = audio_model._compile(model)
+    return lambda batch: backends.run_bucketed(fn, batch, settings.AUDIO_BATCH_BUCKETS)
+
+def evaluate(name: str, keras_model, tflite_model, files, batch_size: int, repeats: int, audio_frontend: bool = False):
+    keras_fn = serving_fn(name, keras_model)
+    tflite_fn = serving_fn(name, tflite_model)
+
+    diffs, agree, labelled = [], 0, []
+    samples = []
+    threshold = settings.VIDEO_THRESHOLD if name in VIDEO_MODELS else settings.AUDIO_THRESHOLD
+    for path in files:
+        inputs = model_inputs(name, path, audio_frontend)
+        if inputs is None:
+            continue
+        samples.append(inputs)
+
+        keras_scores = np.concatenate([head(name, keras_fn(inputs[i:i + batch_size])) for i in range(0, len(inputs), batch_size)])
+        tflite_scores = np.concatenate([head(name, tflite_fn(inputs[i:i + batch_size])) for i in range(0, len(inputs), batch_size)])
+        diffs.append(np.abs(keras_scores - tflite_scores))
+
+        keras_fake = keras_scores.mean() > threshold
+        tflite_fake = tflite_scores.mean() > threshold
+        agree += keras_fake == tflite_fake
+        label = label_of(path)
+        if label is not None:
+            labelled.append((label, keras_fake, tflite_fake))
+
+    report = {"files": len(samples)}
+    if samples:
+        diffs = np.concatenate(diffs)
+        report.update({
+            "mean_abs_score_diff": round(float(diffs.mean()), 6),
+            "max_abs_score_diff": round(float(diffs.max()), 6),
+            "verdict_agreement": round(agree / len(samples), 4),
+        })
+        timing_batch = np.concatenate(samples)[:batch_size]
+    else:
+        print(f"  No evaluation media for {name}; timing on random inputs, accuracy not reported")
+        timing_batch = np.random.default_rng(0).random((batch_size,) + input_shape(name, audio_frontend), dtype=np.float32)
+
+    if labelled:
+        keras_accuracy = np.mean([label == keras_fake for label, keras_fake, _ in labelled])
+        tflite_accuracy = np.mean([label == tflite_fake for label, _, tflite_fake in labelled])
+        report.update({
+            "labelled_files": len(labelled),
+            "keras_accuracy": round(float(keras_accuracy), 4),
+            "tflite_accuracy": round(float(tflite_accuracy), 4),
+            "accuracy_delta": round(float(tflite_accuracy - keras_accuracy), 4),
+        })
+
+    for label, batch in (("batch1", timing_batch[:1]), (f"batch{len(timing_batch)}", timing_batch)):
+        keras_ms = median_ms(keras_fn, batch, repeats)
+        tflite_ms = median_ms(tflite_fn, batch, repeats)
+        report[f"keras_ms_{label}"] = round(keras_ms, 3)
+        report[f"tflite_ms_{label}"] = round(tflite_ms, 3)
+        report[f"speedup_{label}"] = round(keras_ms / tflite_ms, 2)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", nargs="+", choices=VIDEO_MODELS + ("audio",), default=list(VIDEO_MODELS + ("audio",)))
+    parser.add_argument("--quantization", choices=("float", "dynamic", "int8"), default="dynamic")
+    parser.add_argument("--calibration", nargs="*", type=Path, help="Media files or folders to calibrate int8 ranges on")
+    parser.add_argument("--calibration-samples", type=int, default=200, help="Frames / MFCC windows used for calibration")
+    parser.add_argument("--eval", nargs="*", type=Path, help="Media to compare Keras and TFLite on (default: the calibration media)")
+    parser.add_argument("--output-dir", type=Path, default=settings.TFLITE_MODEL_DIR)
+    parser.add_argument("--batch-size", type=int, default=settings.VIDEO_BATCH_SIZE)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--audio-frontend", action="store_true", help="Export the audio model with the MFCC front end built in (raw PCM input)")
+    parser.add_argument("--report", type=Path, help="Write the comparison report as JSON")
+    args = parser.parse_args()
+
+    calibration_files = media_files(args.calibration)
+    eval_files = media_files(args.eval) if args.eval else calibration_files
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    report = {"quantization": args.quantization, "audio_frontend": args.audio_frontend, "models": {}}
+    for name in args.models:
+        print(f"{name}: loading {settings.model_path(name)}")
+        keras_model = load_keras(name, args.audio_frontend)
+
+        quantization = args.quantization
+        if name == "audio" and args.audio_frontend and quantization != "float":
+            print(f"  {quantization} quantisation breaks the MFCC front end; exporting {name} as float")
+            quantization = "float"
+
+        calibration = None
+        if quantization == "int8":
+            chunks = [x for x in (model_inputs(name, path, args.audio_frontend) for path in calibration_files) if x is not None]
+            if chunks:
+                calibration = np.concatenate(chunks)
+                # Spread the samples over all calibration media
+                keep = np.linspace(0, len(calibration) - 1, min(args.calibration_samples, len(calibration))).astype(int)
+                calibration = calibration[keep]
+
+        output_path = args.output_dir / f"{name}.tflite"
+        output_path.write_bytes(convert(keras_model, name, quantization, calibration))
+        print(f"  wrote {output_path} ({output_path.stat().st_size / 1e6:.1f} MB)")
+
+        model_report = evaluate(
+            name, keras_model, backends.TFLiteBackend(output_path), eval_files, args.batch_size, args.repeats,
+            args.audio_frontend
+        )
+        model_report["quantization"] = quantization
+        model_report["keras_mb"] = round(settings.model_path(name).stat().st_size / 1e6, 2)
+        model_report["tflite_mb"] = round(output_path.stat().st_size / 1e6, 2)
+        report["models"][name] = model_report
+        print("  " + json.dumps(model_report))
+
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.report}")
+
+if __name__ == "__main__":
+    main()